@@ -1,6 +1,7 @@
 """飞机生命补给"""
 import pygame
-from random import *
+import assets
+from rng import randint, choice
 import math
 
 class Life(pygame.sprite.Sprite):
@@ -8,19 +9,16 @@ class Life(pygame.sprite.Sprite):
         pygame.sprite.Sprite.__init__(self)
         
         self.size = size
-        self.image = pygame.image.load("images/life1.png").convert_alpha()
+        self.image = assets.load_image("images/life1.png")
         
-        self.mask = pygame.mask.from_surface(self.image)
-        self.rect_o = self.image.get_rect()
+        self.mask = assets.get_mask(self.image)
         #缩小图片
         self.image_list = []
-        self.image = pygame.transform.smoothscale(self.image,\
-                                                  (int(self.rect_o.width * 0.5),\
-                                                   int(self.rect_o.height * 0.5)))
+        self.image = assets.load_image("images/life1.png", scale=(0.5, 0.5))
         self.image_list.extend((self.image, \
-                                pygame.transform.rotate(self.image,90),\
-                                pygame.transform.rotate(self.image,180),\
-                                pygame.transform.rotate(self.image,270)))
+                                assets.load_image("images/life1.png", scale=(0.5, 0.5), angle=90),\
+                                assets.load_image("images/life1.png", scale=(0.5, 0.5), angle=180),\
+                                assets.load_image("images/life1.png", scale=(0.5, 0.5), angle=270)))
         
         self.rect = self.image.get_rect()
         self.rect.left, self.rect.top = position
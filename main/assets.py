@@ -0,0 +1,70 @@
+"""图片资源缓存
+
+同一张图片（相同的转换、缩放和旋转）只解码一次，所有精灵实例共用同一个Surface；
+碰撞用的Mask按Surface缓存，用同一张图片的精灵共用同一个Mask。
+图片加载时转换成显示Surface的像素格式，blit时不用逐像素转换，unconverted()用来检查。
+缓存里的Surface和Mask是共享的，不要直接修改。
+"""
+
+import pygame
+
+_images = {}
+# id(Surface) -> (Surface, Mask)，同时持有Surface保证id不会被复用
+_masks = {}
+
+
+def load_image(path, alpha=True, scale=None, angle=0):
+    """
+    alpha: True用convert_alpha()，False用convert()（不透明的背景），None保持文件原来的像素格式
+    scale: (sx, sy)，按原图宽高的比例smoothscale
+    angle: 缩放之后再旋转的角度
+    """
+    key = (path, alpha, scale, angle)
+    image = _images.get(key)
+    if image is None:
+        if angle:
+            image = pygame.transform.rotate(load_image(path, alpha, scale), angle)
+        elif scale is not None:
+            image = load_image(path, alpha)
+            rect = image.get_rect()
+            image = pygame.transform.smoothscale(image, (int(rect.width * scale[0]),
+                                                         int(rect.height * scale[1])))
+        else:
+            image = pygame.image.load(path)
+            if alpha:
+                image = image.convert_alpha()
+            elif alpha is not None:
+                image = image.convert()
+        _images[key] = image
+    return image
+
+
+def get_mask(image):
+    entry = _masks.get(id(image))
+    if entry is None:
+        entry = (image, pygame.mask.from_surface(image))
+        _masks[id(image)] = entry
+    return entry[1]
+
+
+def load_images(paths, alpha=True):
+    return [load_image(path, alpha) for path in paths]
+
+
+def _format(image):
+    return image.get_bitsize(), image.get_masks(), bool(image.get_flags() & pygame.SRCALPHA)
+
+
+def unconverted():
+    """
+    返回缓存里像素格式和显示Surface的convert()、convert_alpha()格式都不一致的图片，
+    每项为load_image的参数(path, alpha, scale, angle)
+    """
+    probe = pygame.Surface((1, 1))
+    formats = (_format(probe.convert()), _format(probe.convert_alpha()))
+    return [key for key, image in _images.items() if _format(image) not in formats]
+
+
+def clear():
+    _images.clear()
+    _masks.clear()
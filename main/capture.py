@@ -0,0 +1,61 @@
+import threading
+import time
+
+import cv2
+
+
+class CameraCapture(object):
+    """
+    后台摄像头采集线程
+    工作线程持续读取摄像头并只保留最新一帧，游戏循环取帧时不会被cap.read()阻塞
+    """
+
+    def __init__(self, index, width=1280, height=720):
+        self.cap = cv2.VideoCapture(index)
+        self.cap.set(3, width)
+        self.cap.set(4, height)
+        self._lock = threading.Lock()
+        self._frame = None
+        # 帧序号，用来判断是否有新帧
+        self._seq = 0
+        self._read_seq = 0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while self._running:
+            # frame_rgb即视频的一帧数据
+            ret, frame_rgb = self.cap.read()
+            if not ret or frame_rgb is None:
+                # 偶尔读帧失败时跳过这一帧，稍等再读
+                time.sleep(0.01)
+                continue
+            frame_bgr = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2BGR)
+            with self._lock:
+                # 直接覆盖，来不及取走的旧帧丢弃
+                self._frame = frame_bgr
+                self._seq += 1
+
+    def read(self):
+        """
+        取最新一帧，没有新帧时返回None
+        """
+        with self._lock:
+            if self._seq == self._read_seq:
+                return None
+            self._read_seq = self._seq
+            return self._frame
+
+    def release(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.cap.release()
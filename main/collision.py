@@ -0,0 +1,58 @@
+import pygame
+
+
+class SpatialHash(object):
+    """
+    均匀网格碰撞粗检测
+    每帧按精灵的rect把敌机放进边长为cell_size的格子里，子弹只和同一格子里、
+    rect相交的敌机做像素级mask检测，结果与pygame.sprite.spritecollide一致（顺序也一致）
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self._cells = {}
+        self._sprites = []
+
+    def clear(self):
+        self._cells.clear()
+        self._sprites = []
+
+    def _cell_range(self, rect):
+        size = self.cell_size
+        return (range(rect.left // size, (rect.right - 1) // size + 1),
+                range(rect.top // size, (rect.bottom - 1) // size + 1))
+
+    def build(self, sprites):
+        """
+        用sprites当前的位置重建网格，精灵移动之后要重新调用
+        """
+        self.clear()
+        cells = self._cells
+        for index, sprite in enumerate(sprites):
+            self._sprites.append(sprite)
+            xs, ys = self._cell_range(sprite.rect)
+            for x in xs:
+                for y in ys:
+                    cell = cells.get((x, y))
+                    if cell is None:
+                        cells[(x, y)] = [index]
+                    else:
+                        cell.append(index)
+
+    def candidates(self, rect):
+        """
+        返回rect与之相交的精灵，按加入网格的顺序排列
+        """
+        cells = self._cells
+        found = set()
+        xs, ys = self._cell_range(rect)
+        for x in xs:
+            for y in ys:
+                cell = cells.get((x, y))
+                if cell:
+                    found.update(cell)
+        sprites = self._sprites
+        return [sprites[index] for index in sorted(found) if rect.colliderect(sprites[index].rect)]
+
+    def spritecollide(self, sprite, collided=pygame.sprite.collide_mask):
+        return [other for other in self.candidates(sprite.rect) if collided(sprite, other)]
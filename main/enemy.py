@@ -1,10 +1,48 @@
 import pygame
-from random import *
+import assets
+from rng import randint
+from collections import namedtuple
+
+# 敌机种类
+SMALL, MID, BIG, BOSS = range(4)
+
+# 敌机的伤害、得分和掉落参数
+# armored: 被击中只扣能量，否则一击毁灭
+# missile_damage: 飞弹伤害
+# shield_cost: 撞上防护罩时扣除的防护罩能量（再乘以关卡数）
+# score: 毁灭得分
+# drops: 毁灭时分别以1/n的概率掉落(炸弹, 子弹, 生命)补给
+Profile = namedtuple("Profile", "kind armored missile_damage shield_cost score drops")
+
+
+def park(enemy):
+    """
+    敌机reset()到屏幕上方之后交给出场调度（见spawn.SpawnScheduler），没有调度时原地等待
+    """
+    if enemy.spawner is not None:
+        enemy.spawner.park(enemy)
+
+
+def hit(enemy, damage):
+    """
+    敌机被击中，有装甲的扣除damage点能量，能量耗尽或没有装甲时毁灭
+    """
+    if enemy.profile.armored:
+        enemy.hit = True
+        enemy.energy -= damage
+        if enemy.energy <= 0:
+            enemy.active = False
+    else:
+        enemy.active = False
+
 
 class SmallEnemy(pygame.sprite.Sprite):
+    profile = Profile(SMALL, False, 0, 10, 100, (1000, 1000, 2000))
+    spawner = None
+
     def __init__(self,size):
          pygame.sprite.Sprite.__init__(self)
-         self.image = pygame.image.load("images/enemy1.png").convert_alpha()
+         self.image = assets.load_image("images/enemy1.png")
          self.rect = self.image.get_rect()
          self.size = size
          #self.speed = 2
@@ -12,13 +50,13 @@ class SmallEnemy(pygame.sprite.Sprite):
          self.rect.top, self.rect.left = randint(-30 * self.rect.height, 0), \
                                          randint(0,self.size[0]-self.rect.width)
          self.active = True
-         self.mask = pygame.mask.from_surface(self.image)
+         self.mask = assets.get_mask(self.image)
          self.destroy_image = []
-         self.destroy_image.extend([\
-            pygame.image.load("images/enemy1_down1.png").convert_alpha(),\
-            pygame.image.load("images/enemy1_down2.png").convert_alpha(),\
-            pygame.image.load("images/enemy1_down3.png").convert_alpha(),\
-            pygame.image.load("images/enemy1_down4.png").convert_alpha()])
+         self.destroy_image.extend(assets.load_images([\
+            "images/enemy1_down1.png",\
+            "images/enemy1_down2.png",\
+            "images/enemy1_down3.png",\
+            "images/enemy1_down4.png"]))
 
     def move(self):
         if self.rect.top < self.size[1] -110 :
@@ -30,27 +68,30 @@ class SmallEnemy(pygame.sprite.Sprite):
         self.active = True
         self.rect.top, self.rect.left = randint(-25 * self.rect.height, 0), \
                                         randint(0,self.size[0]-self.rect.width)
+        park(self)
 
 class MidEnemy(pygame.sprite.Sprite):
     energy = 10
+    profile = Profile(MID, True, 50, 50, 5, (100, 100, 200))
+    spawner = None
     
     def __init__(self,size):
         pygame.sprite.Sprite.__init__(self)
-        self.image = pygame.image.load("images/enemy2.png")
-        self.image_hit = pygame.image.load("images/enemy2_hit.png").convert_alpha()
+        self.image = assets.load_image("images/enemy2.png")
+        self.image_hit = assets.load_image("images/enemy2_hit.png")
         self.rect = self.image.get_rect()
         self.size = size
         self.speed = 1
         self.rect.top, self.rect.left = randint(-35 * self.rect.height, -5 * self.rect.height), \
                                         randint(0, self.size[0]-self.rect.width)
         self.active = True
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = assets.get_mask(self.image)
         self.destroy_image = []
-        self.destroy_image.extend([\
-            pygame.image.load("images/enemy2_down1.png").convert_alpha(),\
-            pygame.image.load("images/enemy2_down2.png").convert_alpha(),\
-            pygame.image.load("images/enemy2_down3.png").convert_alpha(),\
-            pygame.image.load("images/enemy2_down4.png").convert_alpha()])
+        self.destroy_image.extend(assets.load_images([\
+            "images/enemy2_down1.png",\
+            "images/enemy2_down2.png",\
+            "images/enemy2_down3.png",\
+            "images/enemy2_down4.png"]))
         self.energy = MidEnemy.energy
         self.hit = False
 
@@ -66,30 +107,33 @@ class MidEnemy(pygame.sprite.Sprite):
         self.active = True      
         self.rect.top, self.rect.left = randint(-35 * self.rect.height, -5 * self.rect.height), \
                                         randint(0, self.size[0]-self.rect.width)
+        park(self)
 
 class BigEnemy(pygame.sprite.Sprite):
     energy = 50
+    profile = Profile(BIG, True, 50, 100, 100, (10, 10, 20))
+    spawner = None
     
     def __init__(self,size):
         pygame.sprite.Sprite.__init__(self)
-        self.image1 = pygame.image.load("images/enemy3_n1.png").convert_alpha()
-        self.image2 = pygame.image.load("images/enemy3_n2.png").convert_alpha()
-        self.image_hit = pygame.image.load("images/enemy3_hit.png").convert_alpha()
+        self.image1 = assets.load_image("images/enemy3_n1.png")
+        self.image2 = assets.load_image("images/enemy3_n2.png")
+        self.image_hit = assets.load_image("images/enemy3_hit.png")
         self.rect = self.image1.get_rect()
         self.size = size
         self.speed = 1
         self.rect.top, self.rect.left = randint(-40 * self.rect.height, -5 * self.rect.height), \
                                         randint(0, self.size[0]-self.rect.width)
         self.active = True
-        self.mask = pygame.mask.from_surface(self.image1)
+        self.mask = assets.get_mask(self.image1)
         self.destroy_image = []
-        self.destroy_image.extend([\
-            pygame.image.load("images/enemy3_down1.png").convert_alpha(),\
-            pygame.image.load("images/enemy3_down2.png").convert_alpha(),\
-            pygame.image.load("images/enemy3_down3.png").convert_alpha(),\
-            pygame.image.load("images/enemy3_down4.png").convert_alpha(),\
-            pygame.image.load("images/enemy3_down5.png").convert_alpha(),\
-            pygame.image.load("images/enemy3_down6.png").convert_alpha()])
+        self.destroy_image.extend(assets.load_images([\
+            "images/enemy3_down1.png",\
+            "images/enemy3_down2.png",\
+            "images/enemy3_down3.png",\
+            "images/enemy3_down4.png",\
+            "images/enemy3_down5.png",\
+            "images/enemy3_down6.png"]))
         self.energy = BigEnemy.energy
         self.hit = False
 
@@ -105,13 +149,22 @@ class BigEnemy(pygame.sprite.Sprite):
         self.active = True        
         self.rect.top, self.rect.left = randint(-40 * self.rect.height, -5 * self.rect.height), \
                                         randint(0, self.size[0]-self.rect.width)
+        park(self)
 
 class Boss(pygame.sprite.Sprite):
     energy = 200
+    # boss的撞击和掉落在main里单独处理
+    profile = Profile(BOSS, True, 70, 0, 0, None)
+    # boss/lv1.png ~ lv7.png
+    LEVELS = 7
     def __init__(self,size):
         pygame.sprite.Sprite.__init__(self)
-        self.image = pygame.image.load("boss/lv1.png").convert_alpha()
-        self.image_hit = pygame.image.load("boss/lv1_hit.png").convert_alpha()
+        # 所有关卡的(图片, 被击中图片, mask)在开局时准备好，升级时reset()只按下标切换，不读盘
+        self.variants = []
+        for lv in range(1, Boss.LEVELS + 1):
+            image = assets.load_image("boss/lv%d.png" % lv)
+            self.variants.append((image, assets.load_image("boss/lv%d_hit.png" % lv), assets.get_mask(image)))
+        self.image, self.image_hit, self.mask = self.variants[0]
         
         self.size = size
         self.rect = self.image.get_rect()
@@ -120,7 +173,6 @@ class Boss(pygame.sprite.Sprite):
         self.hit = False
         self.speed = 1
         self.speed_level = 0
-        self.mask = pygame.mask.from_surface(self.image)
         self.energy = Boss.energy
         self.game_lv = 1
 
@@ -149,8 +201,8 @@ class Boss(pygame.sprite.Sprite):
         self.energy = Boss.energy
         self.active = True
         
-        self.image = pygame.image.load("boss/lv%d.png"%(self.game_lv)).convert_alpha()
-        self.image_hit = pygame.image.load("boss/lv%s_hit.png"%(self.game_lv)).convert_alpha()
+        # 超过最后一关的图片时沿用最后一关
+        self.image, self.image_hit, self.mask = self.variants[min(self.game_lv, len(self.variants)) - 1]
         self.game_lv += 1
 
     def _return(self):
@@ -1,150 +1,34 @@
 import pygame
+import assets
+from projectile import ProjectileKind
 
 #尾气
-class Bullet(pygame.sprite.Sprite):
-    def __init__(self,size):
-        
-        pygame.sprite.Sprite.__init__(self)
-        self.size = size
-        self.image = pygame.image.load("boss/weiqi.png").convert_alpha()
-        self.rect = self.image.get_rect()
-        
-        self.speed = 10
-        self.active = False
-        self.mask = pygame.mask.from_surface(self.image)
-
-    def move(self):
-        self.rect.top += self.speed
-        if self.rect.top > self.size[1]:
-            self.active = False
-            
-    def reset(self,position):   
-        self.rect.left, self.rect.top = position
-        self.active = True
+class Bullet(ProjectileKind):
+    def __init__(self):
+        ProjectileKind.__init__(self, assets.load_image("boss/weiqi.png"), 10)
 
 #boss子弹1
-class Bullet1(pygame.sprite.Sprite):
-    def __init__(self, size):
-
-        pygame.sprite.Sprite.__init__(self)
-        self.size = size        
-        self.image = pygame.image.load("boss/boss_b1.png").convert_alpha()
-        self.rect_o = self.image.get_rect()
-        self.image = pygame.transform.smoothscale(self.image,\
-                                                  (int(self.rect_o.width * 0.5),\
-                                                   int(self.rect_o.height * 0.5)))
-        self.rect = self.image.get_rect()
-        #self.rect.left ,self.rect.top = position
-        self.speed = 5
-        self.active = False
-        self.mask = pygame.mask.from_surface(self.image)
-
-    def move(self):
-        self.rect.top += self.speed
-        if self.rect.top > self.size[1]:
-            self.active = False
-
-    def reset(self,position):   
-        self.rect.left, self.rect.top = position
-        self.active = True
+class Bullet1(ProjectileKind):
+    def __init__(self):
+        ProjectileKind.__init__(self, assets.load_image("boss/boss_b1.png", scale=(0.5, 0.5)), 5)
 
 #boss子弹2
-class Bullet2(pygame.sprite.Sprite):
-    def __init__(self, size):
-
-        pygame.sprite.Sprite.__init__(self)
-        self.size = size        
-        self.image = pygame.image.load("boss/boss_b2.png").convert_alpha()
-        self.rect_o = self.image.get_rect()
-        self.image = pygame.transform.smoothscale(self.image,\
-                                                  (int(self.rect_o.width * 0.5),\
-                                                   int(self.rect_o.height * 0.5)))
-        self.rect = self.image.get_rect()
-        #self.rect.left, self.rect.top = position
-        self.speed = 5
-        self.active = False
-        self.mask = pygame.mask.from_surface(self.image)
-
-    def move(self):
-        self.rect.top += self.speed
-        if self.rect.top > self.size[1]:
-            self.active = False
-
-    def reset(self,position):   
-        self.rect.left, self.rect.top = position
-        self.active = True
+class Bullet2(ProjectileKind):
+    def __init__(self):
+        ProjectileKind.__init__(self, assets.load_image("boss/boss_b2.png", scale=(0.5, 0.5)), 5)
 
 #boss子弹3
-class Bullet3(pygame.sprite.Sprite):
-    def __init__(self, size):
-
-        pygame.sprite.Sprite.__init__(self)
-        self.size = size        
-        self.image = pygame.image.load("boss/boss_b3.png").convert_alpha()
-        self.rect_o = self.image.get_rect()
-        self.image = pygame.transform.smoothscale(self.image,\
-                                                  (int(self.rect_o.width * 0.5),\
-                                                   int(self.rect_o.height * 0.5)))
-        self.rect = self.image.get_rect()
-        #self.rect.left, self.rect.top = position
-        self.speed = 5
-        self.active = False
-        self.mask = pygame.mask.from_surface(self.image)
-
-    def move(self):
-        self.rect.top += self.speed
-        if self.rect.top > self.size[1]:
-            self.active = False
-
-    def reset(self,position):   
-        self.rect.left, self.rect.top = position
-        self.active = True
+class Bullet3(ProjectileKind):
+    def __init__(self):
+        ProjectileKind.__init__(self, assets.load_image("boss/boss_b3.png", scale=(0.5, 0.5)), 5)
 
 #boss子弹a
-class Bullet_a(pygame.sprite.Sprite):
-    def __init__(self, size):
-
-        pygame.sprite.Sprite.__init__(self)
-        self.size = size        
-        self.image = pygame.image.load("boss/boss_a1.png").convert_alpha()
-        self.rect = self.image.get_rect()
-        #self.rect.left, self.rect.top = position
-        self.speed = 5
-        self.active = False
-        self.mask = pygame.mask.from_surface(self.image)
-
-    def move(self):
-        self.rect.top += self.speed
-        if self.rect.top > self.size[1]:
-            self.active = False
-
-    def reset(self,position):   
-        self.rect.left, self.rect.top = position
-        self.active = True
+class Bullet_a(ProjectileKind):
+    def __init__(self):
+        ProjectileKind.__init__(self, assets.load_image("boss/boss_a1.png"), 5)
         
 
-class Lasers1(pygame.sprite.Sprite):
-    def __init__(self, size, position):
-
-        pygame.sprite.Sprite.__init__(self)
-        self.image = pygame.image.load("boss/jiguang4.png").convert_alpha()
-        self.rect_o = self.image.get_rect()
-        self.size = size
-        self.image = pygame.transform.smoothscale(self.image,\
-                                                  (int(self.rect_o.width * 0.25),\
-                                                   int(self.rect_o.height * 5.9)))
-        self.rect = self.image.get_rect()
-        self.rect.left, self.rect.top = position
-        self.mask = pygame.mask.from_surface(self.image)
-        self.speed = 2
-        self.active = False
-        self.lv = 3
-
-    def move(self):
-        self.rect.top += self.speed
-        if self.rect.bottom >= self.size[1]:
-            self.active = False
-
-    def reset(self,position):
-        self.rect.left, self.rect.top = position
-        self.active = True
+class Lasers1(ProjectileKind):
+    def __init__(self):
+        #底边到达屏幕底部就消失
+        ProjectileKind.__init__(self, assets.load_image("boss/jiguang4.png", scale=(0.25, 5.9)), 2, clip=True)
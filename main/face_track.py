@@ -0,0 +1,181 @@
+import cv2
+import numpy as np
+
+from rockx import RockX
+
+
+def box_area(box):
+    return (box.right - box.left) * (box.bottom - box.top)
+
+
+class FaceTracker(object):
+    """
+    人脸ROI跟踪
+    先全图检测一次，之后只在上一帧人脸框外扩后的ROI里重新检测；
+    ROI里找不到人脸或每隔redetect_interval帧时回退到全图检测，redetect_interval<=1时每帧都全图检测。
+    detect_scale < 1 时全图检测在缩小后的画面上进行，结果映射回原分辨率坐标，
+    之后的关键点检测仍然使用原分辨率画面
+    """
+
+    def __init__(self, face_det_handle, redetect_interval=30, roi_margin=0.5, detect_scale=1.0):
+        self.face_det_handle = face_det_handle
+        self.redetect_interval = redetect_interval
+        # 人脸框每边外扩的比例
+        self.roi_margin = roi_margin
+        self.detect_scale = detect_scale
+        self.box = None
+        self.frame_count = 0
+
+    def reset(self):
+        self.box = None
+        self.frame_count = 0
+
+    def _detect(self, image, scale=1.0):
+        if scale != 1.0:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        img_h, img_w = image.shape[:2]
+        ret, results = self.face_det_handle.rockx_face_detect(image, img_w, img_h,
+                                                              RockX.ROCKX_PIXEL_FORMAT_BGR888)
+        if ret != RockX.ROCKX_RET_SUCCESS or not results:
+            return []
+        if scale != 1.0:
+            results = [map_result(result, 0, 0, 1 / scale) for result in results]
+        return results
+
+    def _roi(self, img_w, img_h):
+        box = self.box
+        margin_w = int((box.right - box.left) * self.roi_margin)
+        margin_h = int((box.bottom - box.top) * self.roi_margin)
+        left = max(box.left - margin_w, 0)
+        top = max(box.top - margin_h, 0)
+        right = min(box.right + margin_w, img_w)
+        bottom = min(box.bottom + margin_h, img_h)
+        return left, top, right, bottom
+
+    def _detect_roi(self, frame):
+        img_h, img_w = frame.shape[:2]
+        left, top, right, bottom = self._roi(img_w, img_h)
+        if right <= left or bottom <= top:
+            return []
+        # ROI本身就很小，直接用原分辨率检测
+        roi = np.ascontiguousarray(frame[top:bottom, left:right])
+        # 把ROI内的坐标映射回整幅画面
+        return [map_result(result, left, top) for result in self._detect(roi)]
+
+    def detect(self, frame):
+        """
+        返回画面中的人脸检测结果，坐标都是整幅原分辨率画面的坐标
+        """
+        results = []
+        if self.box is not None and self.redetect_interval > 1 and self.frame_count % self.redetect_interval:
+            results = self._detect_roi(frame)
+        if not results:
+            # 跟丢或到了定期重检的帧
+            results = self._detect(frame, self.detect_scale)
+            self.frame_count = 0
+        self.frame_count += 1
+        if results:
+            self.box = max(results, key=lambda result: box_area(result.box)).box
+        else:
+            self.box = None
+        return results
+
+
+def map_result(result, offset_x, offset_y, scale=1.0):
+    """
+    把检测结果的人脸框先按scale缩放，再平移(offset_x, offset_y)
+    """
+    box = result.box
+    return result._replace(box=RockX.Rect(left=int(box.left * scale) + offset_x,
+                                          top=int(box.top * scale) + offset_y,
+                                          right=int(box.right * scale) + offset_x,
+                                          bottom=int(box.bottom * scale) + offset_y))
+
+
+class LandmarkFlow(object):
+    """
+    关键点光流传播
+    每interval帧运行一次68点关键点模型，中间帧在人脸区域上用金字塔LK光流把上一帧的关键点传播过来；
+    光流前后向误差超过max_error像素或有点跟丢时立即重新运行模型
+    """
+
+    def __init__(self, landmark_handle, interval=3, max_error=2.0, roi_margin=0.3,
+                 win_size=(15, 15), max_level=2):
+        self.landmark_handle = landmark_handle
+        self.interval = interval
+        self.max_error = max_error
+        self.roi_margin = roi_margin
+        self.lk_params = dict(winSize=win_size, maxLevel=max_level,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+        self.reset()
+
+    def reset(self):
+        self.last_landmark = None
+        # 上一帧的关键点（整幅画面坐标，保留亚像素精度）
+        self.points = None
+        self.prev_gray = None
+        self.roi = None
+        self.frame_count = 0
+
+    def _roi(self, frame):
+        img_h, img_w = frame.shape[:2]
+        left, top = self.points.min(axis=0)
+        right, bottom = self.points.max(axis=0)
+        margin_w = (right - left) * self.roi_margin
+        margin_h = (bottom - top) * self.roi_margin
+        return (max(int(left - margin_w), 0), max(int(top - margin_h), 0),
+                min(int(right + margin_w) + 1, img_w), min(int(bottom + margin_h) + 1, img_h))
+
+    def _gray(self, frame, roi):
+        left, top, right, bottom = roi
+        return cv2.cvtColor(frame[top:bottom, left:right], cv2.COLOR_BGR2GRAY)
+
+    def _anchor(self, frame, box):
+        img_h, img_w = frame.shape[:2]
+        ret, landmark = self.landmark_handle.rockx_face_landmark(frame, img_w, img_h,
+                                                                 RockX.ROCKX_PIXEL_FORMAT_BGR888, box)
+        if ret != RockX.ROCKX_RET_SUCCESS or landmark is None or landmark.landmarks_count <= 0:
+            self.reset()
+            return ret, landmark
+        self.last_landmark = landmark
+        self.points = np.array([(p.x, p.y) for p in landmark.landmarks], dtype=np.float32)
+        self.frame_count = 0
+        return ret, landmark
+
+    def _propagate(self, frame):
+        offset = np.float32(self.roi[:2])
+        gray = self._gray(frame, self.roi)
+        p0 = (self.points - offset).reshape(-1, 1, 2)
+        p1, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, p0, None, **self.lk_params)
+        if p1 is None or not status.all():
+            return None
+        # 反向光流检查：传播过去再传播回来应回到原位置
+        p0r, status_r, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, p1, None, **self.lk_params)
+        if p0r is None or not status_r.all():
+            return None
+        error = np.linalg.norm((p0 - p0r).reshape(-1, 2), axis=1).mean()
+        if error > self.max_error:
+            return None
+        return p1.reshape(-1, 2) + offset
+
+    def landmark(self, frame, box):
+        """
+        返回(ret, landmark)，与rockx_face_landmark一致
+        """
+        points = None
+        if self.points is not None and self.frame_count % self.interval:
+            points = self._propagate(frame)
+        if points is None:
+            ret, landmark = self._anchor(frame, box)
+            if self.points is None:
+                return ret, landmark
+        else:
+            self.points = points
+            self.last_landmark = self.last_landmark._replace(
+                landmarks=[p._replace(x=int(round(x)), y=int(round(y)))
+                           for p, (x, y) in zip(self.last_landmark.landmarks, points)])
+        self.frame_count += 1
+        # 下一帧在同一个ROI上计算光流
+        self.roi = self._roi(frame)
+        self.prev_gray = self._gray(frame, self.roi)
+        return RockX.ROCKX_RET_SUCCESS, self.last_landmark
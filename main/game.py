@@ -0,0 +1,691 @@
+"""游戏会话
+
+GameSession保存一局游戏的全部状态和规则，不绘制、不播放声音，也不依赖实际时间：
+补给、双倍子弹和无敌时间的定时器按帧计数（FPS帧为1秒）。
+reset(seed)开始一局，step(action)推进一帧并返回(observation, reward, done, info)，
+observation是屏幕内所有实体的NumPy数组，用于自动测试和压力测试。
+main()每帧把键盘和头部姿态换成动作交给step()，再按会话的状态绘制画面、按events播放音效。
+"""
+
+import os
+
+import numpy as np
+import pygame
+
+import _plane
+import plane
+import shield
+import enemy
+import enemy_bullet
+import bullet
+import supply
+import rng
+from rng import choice
+from collision import SpatialHash
+from projectile import ProjectilePool
+from spawn import SpawnScheduler
+
+SIZE = (512, 758)
+FPS = 60
+
+# 动作，和键盘操作一一对应：方向键移动，Enter开防护罩，空格放炸弹
+NOOP, UP, DOWN, LEFT, RIGHT, SHIELD, BOMB = range(7)
+ACTIONS = 7
+
+# observation每行为(实体类型, 中心x, 中心y, 数值)
+# 数值：我方为剩余生命，敌机为剩余能量，补给为补给种类（0炸弹 1子弹 2生命）
+ENTITY_PLAYER = 1
+# 敌机类型为ENTITY_ENEMY + enemy.SMALL/MID/BIG/BOSS
+ENTITY_ENEMY = 2
+ENTITY_ENEMY_SHOT = 6
+ENTITY_SUPPLY = 7
+MAX_ENTITIES = 64
+
+# 等待出场的敌机在底边超过-SPAWN_MARGIN时回到精灵组，
+# 要早于大敌机开始播放飞行音效的位置（底边为-50）
+SPAWN_MARGIN = 64
+
+# 升级到下一关需要的分数
+LEVEL_SCORES = {1: 500, 2: 1500, 3: 4500, 4: 13500, 5: 40500, 6: 1000000}
+
+# 各种敌机和防护罩的初始能量，关卡中会被修改，开新局时恢复
+_ENERGIES = ((enemy.MidEnemy, enemy.MidEnemy.energy),
+             (enemy.BigEnemy, enemy.BigEnemy.energy),
+             (enemy.Boss, enemy.Boss.energy),
+             (shield.Shield, shield.Shield.energy))
+
+
+def _schedule(each, spawner):
+    # 新生成的敌机同样停在屏幕上方，交给出场调度
+    if spawner is not None:
+        each.spawner = spawner
+        spawner.park(each)
+
+
+def add_small_enemies(group1, group2, num, size=SIZE, spawner=None):
+    for i in range(num):
+        smallenemy = enemy.SmallEnemy(size)
+        group1.add(smallenemy)
+        group2.add(smallenemy)
+        _schedule(smallenemy, spawner)
+
+
+def add_mid_enemies(group1, group2, num, size=SIZE, spawner=None):
+    for i in range(num):
+        midenemy = enemy.MidEnemy(size)
+        group1.add(midenemy)
+        group2.add(midenemy)
+        _schedule(midenemy, spawner)
+
+
+def add_big_enemies(group1, group2, num, size=SIZE, spawner=None):
+    for i in range(num):
+        bigenemy = enemy.BigEnemy(size)
+        group1.add(bigenemy)
+        group2.add(bigenemy)
+        _schedule(bigenemy, spawner)
+
+
+def inc_speed(target, inc):
+    for each in target:
+        each.speed += inc
+
+
+def make_volleys():
+    """
+    我方齐射，每发为(子弹种类, 相对飞机中心的x偏移)，偏移为None时从机头发射
+    返回(各关卡的齐射 lv -> (普通子弹, 双倍子弹), 满级齐射)
+    """
+    bullet1 = bullet.Bullet1()
+    bullet2 = bullet.Bullet2()
+    bullet3 = bullet.Bullet3()
+    bullet4 = bullet.Bullet4()
+    volley1 = [(bullet1, None)]
+    volley2 = [(bullet2, -33), (bullet2, 30)]
+    volley3 = [(bullet2, -33), (bullet1, None), (bullet2, 30)]
+    volley4 = [(bullet1, -33), (bullet2, -15), (bullet2, 15), (bullet1, 30)]
+    volley5 = [(bullet4, -34), (bullet3, -15), (bullet2, None), (bullet3, 15), (bullet4, 30)]
+    volley6 = [(bullet1, -34), (bullet2, -23), (bullet3, -10), (bullet3, 10), (bullet2, 21), (bullet1, 32)]
+    volley7 = [(bullet4, -34), (bullet1, -23), (bullet2, -10), (bullet3, None), (bullet3, 10), (bullet1, 21),
+               (bullet4, 32)]
+    volley8 = [(bullet4, -45), (bullet1, -35), (bullet2, -23), (bullet3, -10), (bullet3, 10), (bullet2, 21),
+               (bullet1, 32), (bullet4, 41)]
+    volley9 = [(bullet1, -44), (bullet2, -34), (bullet2, -23), (bullet3, -10), (bullet3, None), (bullet3, 10),
+               (bullet2, 21), (bullet2, 32), (bullet1, 42)]
+    volley0 = [(bullet4, -55), (bullet1, -45), (bullet2, -34), (bullet2, -23), (bullet3, -10), (bullet3, None),
+               (bullet3, 10), (bullet2, 21), (bullet2, 30), (bullet1, 41), (bullet4, 50)]
+    volleys = {1: (volley1, volley2), 2: (volley2, volley4), 3: (volley3, volley5),
+               4: (volley4, volley6), 5: (volley5, volley7), 6: (volley7, volley9)}
+    return volleys, (volley8, volley0)
+
+
+def make_boss_volleys():
+    """
+    boss子弹：lv -> (发射间隔, 齐射)，每发为(子弹种类, 相对boss中心的x偏移)
+    """
+    boss_bullet_a = enemy_bullet.Bullet_a()
+    boss_bullet1 = enemy_bullet.Bullet1()
+    boss_bullet2 = enemy_bullet.Bullet2()
+    boss_bullet3 = enemy_bullet.Bullet3()
+    boss_volley1 = (120, [(boss_bullet_a, 62), (boss_bullet1, -7), (boss_bullet1, -50), (boss_bullet_a, -80)])
+    boss_volley2 = (130, [(boss_bullet_a, 62), (boss_bullet2, -7), (boss_bullet2, -50), (boss_bullet_a, -80)])
+    boss_volley3 = (140, [(boss_bullet_a, 62), (boss_bullet3, -5), (boss_bullet3, -50), (boss_bullet_a, -80)])
+    return {1: boss_volley1, 2: boss_volley1, 3: boss_volley2, 4: boss_volley2,
+            5: boss_volley3, 6: boss_volley3}
+
+
+def reset_energies():
+    for cls, energy in _ENERGIES:
+        cls.energy = energy
+
+
+class GameSession(object):
+    """
+    一局游戏的全部状态
+    图片和mask要求已经设置过显示模式，没有窗口时用SDL的dummy驱动打开一个
+    """
+
+    def __init__(self, size=SIZE):
+        self.size = size
+        if pygame.display.get_surface() is None:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+            pygame.display.init()
+            pygame.display.set_mode(size)
+        self.volleys, self.max_volleys = make_volleys()
+        self.boss_volleys = make_boss_volleys()
+        self.feidan1 = bullet.Bullet5()
+        self.boss_bullet = enemy_bullet.Bullet()
+        self.lasers1 = enemy_bullet.Lasers1()
+        self.enemy_grid = SpatialHash()
+        self.observation = np.zeros((MAX_ENTITIES, 4), dtype=np.float32)
+
+    def reset(self, seed=None):
+        """
+        开始新的一局，返回第一帧的observation
+        """
+        rng.seed(seed)
+        reset_energies()
+        size = self.size
+
+        self.score = 0
+        self.lv = 1
+        self.lv_dict = {1: 4, 2: 3, 3: 3, 4: 2, 5: 1}
+        self.transform = True
+        self.is_move = True
+        self.frame = 0
+
+        self.myplane = plane.Plane(size)
+        self.shields = shield.Shield()
+        self.life_num = 8
+        self.bomb_num = 10
+        self.is_double = False
+        # m为随着等级提升而增加的能量上限
+        self.m = 1000
+        self.mp = self.m // 20
+
+        self.supply_bomb = supply.Bomb(size)
+        self.supply_bullet = supply.Bullet(size)
+        # 定时器剩余帧数，0为关闭；补给定时器循环触发，其余触发一次
+        self.supply_timer = 25 * FPS
+        self.double_bullet_timer = 0
+        self.invincible_timer = 0
+
+        # 屏幕上方等待出场的敌机
+        self.spawner = SpawnScheduler(SPAWN_MARGIN)
+        self.enemies = pygame.sprite.Group()
+        self.smallenemies = pygame.sprite.Group()
+        add_small_enemies(self.smallenemies, self.enemies, 14, size, self.spawner)
+        self.midenemies = pygame.sprite.Group()
+        add_mid_enemies(self.midenemies, self.enemies, 4, size, self.spawner)
+        self.bigenemies = pygame.sprite.Group()
+        add_big_enemies(self.bigenemies, self.enemies, 2, size, self.spawner)
+        self.bosses = pygame.sprite.Group()
+        self.boss = enemy.Boss(size)
+        self.enemies.add(self.boss)
+        self.bosses.add(self.boss)
+
+        # 敌机毁灭时奖励的补给
+        self.prize_bomb = pygame.sprite.Group()
+        self.prize_bullet = pygame.sprite.Group()
+        self.prize_life = pygame.sprite.Group()
+
+        self.bullets = ProjectilePool(128, size[1])
+        self.feidan = ProjectilePool(12, size[1])
+        self.boss_exhaust = ProjectilePool(2, size[1])
+        self.boss_bullets = ProjectilePool(4, size[1])
+        self.boss_lasers = ProjectilePool(2, size[1])
+
+        # 毁灭动画的帧索引，按敌机种类共用
+        self.small_destroy_index = 0
+        self.mid_destroy_index = 0
+        self.big_destroy_index = 0
+        # 用于延迟帧率
+        self.delay = 10
+        # 用于计boss能量
+        self.boss_delay = 0
+        # 本帧发生的事件，以音效文件命名：use_bomb、upgrade、me_down、supply、bullet
+        self.events = []
+        # 本帧推进的毁灭动画：(敌机, 动画帧, 位置)
+        self.explosions = []
+        return self.observe()
+
+    @property
+    def done(self):
+        return self.life_num < 0
+
+    def step(self, action):
+        """
+        按action推进一帧，返回(observation, reward, done, info)，reward为本帧得分
+        action也可以是按顺序执行的一组动作，main()里键盘和头部姿态在同一帧都能操作飞机
+        """
+        del self.events[:]
+        del self.explosions[:]
+        if self.done:
+            return self.observe(), 0, True, self.info()
+        actions = action if isinstance(action, (list, tuple)) else (action,)
+        score = self.score
+        self.frame += 1
+        self._timers()
+        for each in actions:
+            if each == BOMB:
+                self._bomb()
+        self._update_level()
+        if not self.done:
+            for each in actions:
+                self._move(each)
+            self._update()
+        if self.done:
+            reset_energies()
+        return self.observe(), self.score - score, self.done, self.info()
+
+    def info(self):
+        return {"score": self.score, "lv": self.lv, "life_num": self.life_num, "bomb_num": self.bomb_num,
+                "mp": self.mp, "shield": self.shields.energy if self.shields.active else 0,
+                "frame": self.frame}
+
+    def observe(self):
+        """
+        把屏幕内的实体写进observation，多余的行清零
+        """
+        rows = []
+        myplane = self.myplane
+        rows.append((ENTITY_PLAYER, myplane.rect.centerx, myplane.rect.centery, self.life_num))
+        height = self.size[1]
+        for each in self.enemies:
+            rect = each.rect
+            if each.active and rect.bottom > 0 and rect.top < height:
+                energy = getattr(each, "energy", 1)
+                rows.append((ENTITY_ENEMY + each.profile.kind, rect.centerx, rect.centery, energy))
+        for pool in (self.boss_bullets, self.boss_lasers, self.boss_exhaust):
+            for shot in pool.sprites():
+                rows.append((ENTITY_ENEMY_SHOT, shot.rect.centerx, shot.rect.centery, shot.kind.damage))
+        for value, group in ((0, self.prize_bomb), (1, self.prize_bullet), (2, self.prize_life)):
+            for each in group:
+                rows.append((ENTITY_SUPPLY, each.rect.centerx, each.rect.centery, value))
+        for value, each in ((0, self.supply_bomb), (1, self.supply_bullet)):
+            if each.active:
+                rows.append((ENTITY_SUPPLY, each.rect.centerx, each.rect.centery, value))
+
+        observation = self.observation
+        observation[:] = 0
+        rows = rows[:MAX_ENTITIES]
+        observation[:len(rows)] = rows
+        return observation.copy()
+
+    def _timers(self):
+        if self.supply_timer:
+            self.supply_timer -= 1
+            if not self.supply_timer:
+                self.supply_timer = 25 * FPS
+                if choice([True, False]):
+                    self.supply_bomb.reset()
+                else:
+                    self.supply_bullet.reset()
+        if self.double_bullet_timer:
+            self.double_bullet_timer -= 1
+            if not self.double_bullet_timer:
+                self.is_double = False
+        if self.invincible_timer:
+            self.invincible_timer -= 1
+            if not self.invincible_timer:
+                self.myplane.invincible = False
+                self.myplane.blink = False
+
+    def _bomb(self):
+        if not self.bomb_num:
+            return
+        self.events.append("use_bomb")
+        self.bomb_num -= 1
+        m = self.m
+        if self.mp < m - m // 20:
+            self.mp += m // 20
+        else:
+            self.mp = m
+        for each in self.enemies:
+            if each.profile.kind == enemy.BOSS:
+                if each.rect.bottom == each.rect.height:
+                    each.energy -= 50
+                    if each.energy <= 0:
+                        each.active = False
+            elif each.rect.bottom > 0:
+                each.active = False
+
+    def _lose_life(self):
+        self.events.append("me_down")
+        self.life_num -= 1
+        if self.life_num >= 0:
+            self.myplane.blink = True
+            self.is_double = False
+            self.myplane.reset()
+            self.invincible_timer = 3 * FPS
+            self.bomb_num = 3
+        else:
+            self.myplane.active = False
+
+    def _update_level(self):
+        """
+        分数达到LEVEL_SCORES时放出boss，boss被击毁后升级
+        """
+        lv = self.lv
+        if lv not in LEVEL_SCORES or self.score <= LEVEL_SCORES[lv]:
+            return
+        size = self.size
+        spawner = self.spawner
+        small, mid, big = self.smallenemies, self.midenemies, self.bigenemies
+        if self.transform:
+            # 等待出场的敌机也要加速
+            spawner.wake_all()
+            if lv == 1:
+                add_small_enemies(small, self.enemies, 3, size, spawner)
+                add_mid_enemies(mid, self.enemies, 2, size, spawner)
+                add_big_enemies(big, self.enemies, 1, size, spawner)
+                inc_speed(small, 1)
+            elif lv == 2:
+                add_small_enemies(small, self.enemies, 2, size, spawner)
+                add_mid_enemies(mid, self.enemies, 2, size, spawner)
+                add_big_enemies(big, self.enemies, 1, size, spawner)
+                inc_speed(small, 1)
+                inc_speed(mid, 1)
+                inc_speed(big, 1)
+            elif lv in (3, 4):
+                add_small_enemies(small, self.enemies, 2, size, spawner)
+                add_mid_enemies(mid, self.enemies, 2, size, spawner)
+                add_big_enemies(big, self.enemies, 1, size, spawner)
+                inc_speed(small, 2)
+                inc_speed(mid, 1)
+                if lv == 4:
+                    inc_speed(big, 1)
+            elif lv == 5:
+                add_mid_enemies(mid, self.enemies, 5, size, spawner)
+                add_big_enemies(big, self.enemies, 3, size, spawner)
+                for each in small:
+                    each.speed = 1
+                enemy.BigEnemy.energy = 220
+                enemy.MidEnemy.energy = 50
+                inc_speed(mid, -2)
+                inc_speed(big, -2)
+            else:
+                for each in small:
+                    each.speed = 8
+                enemy.BigEnemy.energy -= 20
+                enemy.MidEnemy.energy -= 100
+                add_small_enemies(small, self.enemies, 2, size, spawner)
+                add_mid_enemies(mid, self.enemies, 1, size, spawner)
+                inc_speed(mid, 3)
+                inc_speed(big, 3)
+            self.transform = False
+            self.is_move = False
+            self.boss.reset()
+
+        if not self.boss.active:
+            self.events.append("upgrade")
+            self.is_move = True
+            self.boss._return()
+            self.transform = True
+            self.score += {1: 200, 2: 500, 3: 800, 4: 1100, 5: 1400, 6: 10000}[lv]
+            if lv in (2, 3, 4):
+                enemy.BigEnemy.energy += 10
+            if lv in (3, 4):
+                enemy.MidEnemy.energy += 5
+            self.shields.active = False
+            self.myplane.invincible = False
+            self.m += {1: 200, 2: 500, 3: 1000, 4: 2000, 5: 3000, 6: 5000}[lv]
+            self.mp = self.m // 20
+            if lv < 6:
+                self.lv = lv + 1
+
+    def _move(self, action):
+        myplane = self.myplane
+        if action == UP:
+            myplane.move_up()
+        elif action == DOWN:
+            myplane.move_down()
+        elif action == LEFT:
+            myplane.move_left()
+        elif action == RIGHT:
+            myplane.move_right()
+        elif action == SHIELD and self.mp == self.m:
+            self.shields.reset()
+            self.mp = 50
+
+    def _update(self):
+        myplane = self.myplane
+        shields = self.shields
+        boss = self.boss
+        lv = self.lv
+        delay = self.delay
+        enemy_grid = self.enemy_grid
+        enemy_grid.build(self.enemies)
+
+        # 防护罩
+        if shields.active:
+            myplane.invincible = True
+            shields.move((myplane.rect.left - 26, myplane.rect.top - 6))
+            shields.hit = False
+            shields_hit = pygame.sprite.spritecollide(shields, self.boss_bullets.sprites(), False,
+                                                      pygame.sprite.collide_mask)
+            if shields_hit:
+                for e in shields_hit:
+                    self.boss_bullets.kill(e.index)
+                shields.energy -= 1
+                if shields.energy <= 0:
+                    shields.active = False
+                    self.invincible_timer = 3 * FPS
+            shields_hit = enemy_grid.spritecollide(shields)
+            if shields_hit:
+                for u in shields_hit:
+                    if u.profile.kind == enemy.BOSS:
+                        u.energy *= 0.8
+                        shields.energy = 0
+                    else:
+                        u.active = False
+                        shields.energy -= u.profile.shield_cost * lv
+                if shields.energy <= 0:
+                    shields.active = False
+                    self.invincible_timer = 3 * FPS
+
+        # 发射飞弹和子弹
+        if not (delay % 100) and lv >= 2 and self.is_double:
+            self.feidan.spawn(self.feidan1, (myplane.rect.centerx - 66, myplane.rect.centery))
+            self.feidan.spawn(self.feidan1, (myplane.rect.centerx + 48, myplane.rect.centery))
+        if not (delay % 10):
+            self.events.append("bullet")
+            for kind, offset in self.volleys[lv][self.is_double]:
+                if offset is None:
+                    self.bullets.spawn(kind, myplane.rect.midtop)
+                else:
+                    self.bullets.spawn(kind, (myplane.rect.centerx + offset, myplane.rect.centery))
+
+        self._update_supplies()
+
+        # boss尾气、子弹和激光
+        if boss.rect.top == 0:
+            boss_exhaust = self.boss_exhaust
+            boss_exhaust.spawn(self.boss_bullet, (boss.rect.centerx + 22, boss.rect.centery))
+            boss_exhaust.spawn(self.boss_bullet, (boss.rect.centerx - 120, boss.rect.centery))
+            boss_exhaust.step()
+            for i in boss_exhaust.sprites():
+                if pygame.sprite.collide_mask(i, myplane):
+                    boss_exhaust.kill(i.index)
+                    self._lose_life()
+
+            boss_bullets = self.boss_bullets
+            if lv in self.boss_volleys:
+                interval, volley = self.boss_volleys[lv]
+                if not delay % interval:
+                    for kind, offset in volley:
+                        boss_bullets.spawn(kind, (boss.rect.centerx + offset, boss.rect.centery))
+            if boss_bullets:
+                boss_bullets.step()
+                for i in boss_bullets.sprites():
+                    if pygame.sprite.collide_mask(i, myplane) and not myplane.invincible:
+                        boss_bullets.kill(i.index)
+                        self._lose_life()
+
+            if lv in (3, 4, 5, 6):
+                self._update_lasers()
+
+        # 飞弹和子弹击中敌机
+        m = self.m
+        if self.feidan:
+            self.feidan.step()
+            for i in self.feidan.sprites():
+                enemy_hit = enemy_grid.spritecollide(i)
+                if enemy_hit:
+                    self.feidan.kill(i.index)
+                    for b in enemy_hit:
+                        if self.mp < m - 50:
+                            self.mp += 50
+                        enemy.hit(b, b.profile.missile_damage)
+        self.bullets.step()
+        for i in self.bullets.sprites():
+            enemy_hit = enemy_grid.spritecollide(i)
+            if enemy_hit:
+                self.bullets.kill(i.index)
+                for b in enemy_hit:
+                    if self.mp < m:
+                        self.mp += 1
+                    enemy.hit(b, i.kind.damage)
+
+        # 双方飞机碰撞
+        enemies_down = enemy_grid.spritecollide(myplane)
+        if enemies_down and not myplane.invincible:
+            self._lose_life()
+            for i in enemies_down:
+                if i.profile.kind == enemy.BOSS:
+                    i.energy *= 0.8
+                else:
+                    i.active = False
+
+        # 关卡boss，被击中的hit标志由绘制时清除
+        self.boss_delay += 1
+        if boss.active:
+            boss.move()
+        elif not self.transform:
+            position = boss.rect.center
+            if not choice(range(self.lv_dict[5])):
+                self.prize_bomb.add(supply.Bomb1(self.size, position))
+            if not choice(range(self.lv_dict[5])):
+                self.prize_life.add(_plane.Life(self.size, position))
+            self.boss_delay = 0
+
+        # boss出现时其他敌机待命
+        if not self.is_move:
+            for each in self.enemies:
+                if each.profile.kind != enemy.BOSS:
+                    each.reset()
+
+        self._update_enemies()
+        self.delay -= 1
+        if not self.delay:
+            self.delay = 1000
+
+    def _update_lasers(self):
+        myplane = self.myplane
+        shields = self.shields
+        boss = self.boss
+        boss_lasers = self.boss_lasers
+        if not (self.boss_delay % 500):
+            boss_lasers.spawn(self.lasers1, (boss.rect.centerx - 68, boss.rect.centery))
+            boss_lasers.spawn(self.lasers1, (boss.rect.centerx + 53, boss.rect.centery))
+        if not boss_lasers:
+            return
+        boss_lasers.step()
+        for i in boss_lasers.sprites():
+            if pygame.sprite.collide_mask(i, myplane) and not myplane.invincible:
+                self._lose_life()
+            if shields.active and pygame.sprite.collide_mask(i, shields):
+                shields.hit = True
+                # hp大于15%按百分比伤害（第3关起每关2%到5%），小于直接秒杀
+                if shields.energy / shield.Shield.energy > 0.15:
+                    shields.energy -= shields.energy * 0.01 * (self.lv - 1)
+                else:
+                    shields.energy = 0
+                if shields.energy <= 0:
+                    shields.active = False
+                    self.invincible_timer = 3 * FPS
+
+    def _update_supplies(self):
+        myplane = self.myplane
+        shields = self.shields
+        collide = pygame.sprite.collide_mask
+        for each in list(self.prize_life):
+            if each.active:
+                each.move()
+                if collide(each, myplane):
+                    self.prize_life.remove(each)
+                    if self.life_num < 6:
+                        self.life_num += 1
+            else:
+                self.prize_life.remove(each)
+        for each in list(self.prize_bomb):
+            if each.active:
+                each.move()
+                if collide(each, myplane):
+                    self.prize_bomb.remove(each)
+                    if self.bomb_num < 6:
+                        self.bomb_num += 1
+            else:
+                self.prize_bomb.remove(each)
+        for each in list(self.prize_bullet):
+            if each.active:
+                each.move()
+                if collide(each, myplane):
+                    self.is_double = True
+                    self.double_bullet_timer = 18 * FPS
+                    self.prize_bullet.remove(each)
+            else:
+                self.prize_bullet.remove(each)
+
+        supply_bomb = self.supply_bomb
+        if supply_bomb.active:
+            supply_bomb.move()
+            if supply_bomb.rect.top == -10:
+                self.events.append("supply")
+                if shields.energy <= 1600:
+                    shields.energy += 400
+            if collide(supply_bomb, myplane):
+                if self.bomb_num < 6:
+                    self.bomb_num += 1
+                supply_bomb.active = False
+        supply_bullet = self.supply_bullet
+        if supply_bullet.active:
+            supply_bullet.move()
+            if supply_bullet.rect.top == -10:
+                self.events.append("supply")
+                if shields.energy <= 1600:
+                    shields.energy += 400
+            if collide(supply_bullet, myplane):
+                self.is_double = True
+                self.double_bullet_timer = 18 * FPS
+                supply_bullet.active = False
+
+    def _update_enemies(self):
+        """
+        移动敌机；被击毁的敌机播放完毁灭动画（每3帧一格）后计分、复位并掉落补给
+        被击中的hit标志由绘制时清除
+        """
+        is_move = self.is_move
+        if is_move:
+            self.spawner.update()
+        animate = not (self.delay % 3)
+        explosions = self.explosions
+        for each in self.bigenemies:
+            if each.active:
+                if is_move:
+                    each.move()
+            elif animate:
+                explosions.append((each, self.big_destroy_index, each.rect.copy()))
+                self.big_destroy_index = (self.big_destroy_index + 1) % 6
+                if self.big_destroy_index == 0:
+                    self._destroyed(each)
+        for each in self.midenemies:
+            if each.active:
+                if is_move:
+                    each.move()
+            elif animate:
+                explosions.append((each, self.mid_destroy_index, each.rect.copy()))
+                self.mid_destroy_index = (self.mid_destroy_index + 1) % 4
+                if self.mid_destroy_index == 0:
+                    self._destroyed(each)
+        for each in self.smallenemies:
+            if each.active:
+                if is_move:
+                    each.move()
+            elif animate:
+                explosions.append((each, self.small_destroy_index, each.rect.copy()))
+                self.small_destroy_index = (self.small_destroy_index + 1) % 4
+                if self.small_destroy_index == 0:
+                    self._destroyed(each)
+
+    def _destroyed(self, each):
+        position = each.rect.center
+        self.score += each.profile.score
+        each.reset()
+        bomb_odds, bullet_odds, life_odds = each.profile.drops
+        if not choice(range(bomb_odds)):
+            self.prize_bomb.add(supply.Bomb1(self.size, position))
+        if not choice(range(bullet_odds)):
+            self.prize_bullet.add(supply.Bullet1(self.size, position))
+        if not choice(range(life_odds)):
+            self.prize_life.add(_plane.Life(self.size, position))
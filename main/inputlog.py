@@ -0,0 +1,134 @@
+"""输入记录与回放
+
+每局游戏开始时先写一行{"seed": 种子}，之后每帧一行紧凑的JSON：
+[按键位图, 事件列表, 头部姿态(pitch, yaw, roll, lips_distance)]，这一帧没有读姿态时省略第三项。
+重新开始游戏时接着写下一局的种子和输入。
+游戏定时器（补给、双倍子弹、无敌时间）在GameSession里按帧计数，不依赖实际时间，
+用同一个种子回放可以逐帧重现整局游戏。
+"""
+
+import json
+
+import pygame
+from pygame.locals import *
+
+# 游戏循环里读取的按键，按位记录
+KEYS = (K_w, K_s, K_a, K_d, K_UP, K_DOWN, K_LEFT, K_RIGHT, K_RETURN, K_x, K_r, K_c)
+# 游戏循环处理的事件类型
+EVENTS = (QUIT, MOUSEBUTTONDOWN, MOUSEMOTION, KEYDOWN)
+# 需要保存的事件属性
+EVENT_ATTRS = ("key", "button", "pos")
+
+
+class KeyState(object):
+    """
+    回放时代替pygame.key.get_pressed()，只记录了KEYS里的按键
+    """
+
+    def __init__(self, mask):
+        self.mask = mask
+
+    def __getitem__(self, key):
+        try:
+            return bool(self.mask >> KEYS.index(key) & 1)
+        except ValueError:
+            return False
+
+
+def _key_mask(key_pressed):
+    mask = 0
+    for bit, key in enumerate(KEYS):
+        if key_pressed[key]:
+            mask |= 1 << bit
+    return mask
+
+
+def _encode_event(event):
+    attrs = {}
+    for name in EVENT_ATTRS:
+        if hasattr(event, name):
+            attrs[name] = getattr(event, name)
+    return [event.type, attrs]
+
+
+class InputRecorder(object):
+    """
+    把每帧的输入写进path
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "w")
+        self._frame = None
+
+    def _flush(self):
+        if self._frame is not None:
+            self.file.write(json.dumps(self._frame, separators=(",", ":")) + "\n")
+            self._frame = None
+
+    def round(self, seed):
+        """
+        每局开始时调用，记录这一局的种子
+        """
+        self._flush()
+        self.file.write(json.dumps({"seed": seed}) + "\n")
+
+    def frame(self, events, key_pressed):
+        """
+        每帧开始时调用，记录这一帧的事件和按键，原样返回
+        """
+        self._flush()
+        self._frame = [_key_mask(key_pressed), [_encode_event(e) for e in events if e.type in EVENTS]]
+        return events, key_pressed
+
+    def pose(self, pose):
+        self._frame.append(list(pose))
+        return pose
+
+    def close(self):
+        if not self.file.closed:
+            self._flush()
+            self.file.close()
+
+
+class InputReplay(object):
+    """
+    按帧读出InputRecorder写下的输入
+    """
+
+    def __init__(self, path):
+        self.file = open(path)
+        self._frame = None
+
+    def round(self):
+        """
+        每局开始时调用，返回记录里这一局的种子，记录读完时返回None
+        """
+        line = self.file.readline()
+        if not line:
+            return None
+        record = json.loads(line)
+        # 回放的输入触发了重新开始，记录里这一局却还没有结束
+        if not isinstance(record, dict):
+            return None
+        return record["seed"]
+
+    def frame(self):
+        """
+        返回这一帧的(事件列表, 按键状态)，记录读完或这一局结束时返回None
+        """
+        line = self.file.readline()
+        if not line:
+            return None
+        self._frame = json.loads(line)
+        if isinstance(self._frame, dict):
+            # 记录时这一帧开始了新的一局，回放的输入没有触发重新开始，和记录已经不一致
+            return None
+        events = [pygame.event.Event(t, {k: tuple(v) if k == "pos" else v for k, v in attrs.items()})
+                  for t, attrs in self._frame[1]]
+        return events, KeyState(self._frame[0])
+
+    def pose(self):
+        return tuple(self._frame[2])
+
+    def close(self):
+        self.file.close()
@@ -2,27 +2,38 @@ import os
 os.environ["CUDA_VISIBLE_DEVICES"] = "0"
 
 from pygame.locals import *
-from random import *
 import traceback
 import pygame
 import sys
-import _plane
-import plane
 import shield
 import enemy
-import enemy_bullet
-import bullet
-import supply
+import assets
 import cv2
 import numpy as np
 
-from rockx import RockX
+try:
+    from rockx import RockX
+except ImportError:
+    # 没有RockX的机器（如构建机）上只能运行--headless
+    RockX = None
 import math
 import argparse
 
 import sqlite3
+import hashlib
+import multiprocessing
+import time
 
 from pose import estimate_head_pose
+from capture import CameraCapture
+from pose_engine import PoseEngine, RockXPoseBackend, FakePoseBackend
+if RockX is not None:
+    from face_track import FaceTracker, LandmarkFlow, box_area
+from render import GameScreen, CachedText
+from pilot import ScriptedPilot, HeadControl
+from game import GameSession, UP, DOWN, LEFT, RIGHT, SHIELD, BOMB
+from inputlog import InputRecorder, InputReplay
+import rng
 
 class FaceDB:
 
@@ -32,27 +43,69 @@ class FaceDB:
         self.cursor = self.conn.cursor()
         if not self._is_face_table_exist():
             self.cursor.execute("create table FACE (NAME text, VERSION int, FEATURE blob, ALIGN_IMAGE blob)")
+        # 按NAME读取对齐图片和更新人脸时用到
+        self.cursor.execute("create index if not exists FACE_NAME on FACE (NAME)")
+        # 记录每张导入图片的内容哈希、修改时间和导入结果，用于增量导入
+        self.cursor.execute("create table if not exists FACE_SOURCE "
+                            "(PATH text primary key, NAME text, HASH text, MTIME real, STATUS text default 'success')")
+        columns = [row[1] for row in self.cursor.execute("pragma table_info(FACE_SOURCE)")]
+        if 'STATUS' not in columns:
+            # 旧库只记录了导入成功的图片
+            self.cursor.execute("alter table FACE_SOURCE add column STATUS text default 'success'")
 
     def load_face(self):
+        """
+        只加载匹配需要的NAME/VERSION/FEATURE，对齐后的人脸图片用load_align_image按需读取
+        """
         all_face = dict()
-        c = self.cursor.execute("select * from FACE")
+        c = self.cursor.execute("select NAME, VERSION, FEATURE from FACE")
         for row in c:
             name = row[0]
             version = row[1]
             feature = np.frombuffer(row[2], dtype='float32')
-            align_img = np.frombuffer(row[3], dtype='uint8')
-            align_img = align_img.reshape((112, 112, 3))
             all_face[name] = {
                 'feature': RockX.FaceFeature(version=version, len=feature.size, feature=feature),
-                'image': align_img
             }
         return all_face
 
+    def load_align_image(self, name):
+        row = self.cursor.execute("select ALIGN_IMAGE from FACE where NAME=?", (name,)).fetchone()
+        if row is None:
+            return None
+        align_img = np.frombuffer(row[0], dtype='uint8')
+        return align_img.reshape((112, 112, 3))
+
     def insert_face(self, name, feature, align_img):
         self.cursor.execute("INSERT INTO FACE (NAME, VERSION, FEATURE, ALIGN_IMAGE) VALUES (?, ?, ?, ?)",
                             (name, feature.version, feature.feature.tobytes(), align_img.tobytes()))
         self.conn.commit()
 
+    def load_sources(self):
+        """
+        已导入图片的 {PATH: (HASH, MTIME, STATUS)}，STATUS为 success/fail
+        """
+        c = self.cursor.execute("select PATH, HASH, MTIME, STATUS from FACE_SOURCE")
+        return {row[0]: (row[1], row[2], row[3]) for row in c}
+
+    def save_faces(self, rows, sources):
+        """
+        rows: [(NAME, VERSION, FEATURE, ALIGN_IMAGE), ...]，已存在的NAME原地更新
+        sources: [(PATH, NAME, HASH, MTIME, STATUS), ...]
+        人脸和来源记录在同一个事务里提交，中断后重新导入可以从上次提交的位置继续
+        """
+        if not rows and not sources:
+            return
+        with self.conn:
+            for name, version, feature, align_img in rows:
+                self.cursor.execute("UPDATE FACE SET VERSION=?, FEATURE=?, ALIGN_IMAGE=? WHERE NAME=?",
+                                    (version, feature, align_img, name))
+                if self.cursor.rowcount == 0:
+                    self.cursor.execute("INSERT INTO FACE (NAME, VERSION, FEATURE, ALIGN_IMAGE) VALUES (?, ?, ?, ?)",
+                                        (name, version, feature, align_img))
+            self.cursor.executemany("INSERT OR REPLACE INTO FACE_SOURCE (PATH, NAME, HASH, MTIME, STATUS) "
+                                    "VALUES (?, ?, ?, ?, ?)",
+                                    sources)
+
     def _get_tables(self):
         cursor = self.cursor
         cursor.execute("select name from sqlite_master where type='table' order by name")
@@ -71,29 +124,41 @@ def get_max_face(results):
     max_area = 0
     max_face = None
     for result in results:
-        area = (result.box.bottom - result.box.top) * (result.box.right * result.box.left)
+        area = box_area(result.box)
         if area > max_area:
+            max_area = area
             max_face = result
     return max_face
 
 
-def get_face_feature(image_path):
-    face_recog_handle = RockX(RockX.ROCKX_MODULE_FACE_RECOGNIZE, target_device=args.device)
+def get_face_feature(image_path, handles=None):
     img = cv2.imread(image_path)
+    if img is None:
+        return None, None
+    return get_image_feature(img, handles)
+
+
+def get_image_feature(img, handles=None):
+    """
+    handles: (人脸检测, 5点关键点, 人脸识别)句柄，默认使用全局句柄
+    """
+    if handles is None:
+        handles = (face_det_handle, face_landmark5_handle, face_recog_handle)
+    det_handle, landmark5_handle, recog_handle = handles
     img_h, img_w = img.shape[:2]
-    ret, results = face_det_handle.rockx_face_detect(img, img_w, img_h, RockX.ROCKX_PIXEL_FORMAT_BGR888)
+    ret, results = det_handle.rockx_face_detect(img, img_w, img_h, RockX.ROCKX_PIXEL_FORMAT_BGR888)
     if ret != RockX.ROCKX_RET_SUCCESS:
         return None, None
     max_face = get_max_face(results)
     if max_face is None:
         return None, None
-    ret, align_img = face_landmark5_handle.rockx_face_align(img, img_w, img_h,
-                                                            RockX.ROCKX_PIXEL_FORMAT_BGR888,
-                                                            max_face.box, None)
+    ret, align_img = landmark5_handle.rockx_face_align(img, img_w, img_h,
+                                                       RockX.ROCKX_PIXEL_FORMAT_BGR888,
+                                                       max_face.box, None)
     if ret != RockX.ROCKX_RET_SUCCESS:
         return None, None
     if align_img is not None:
-        ret, face_feature = self.face_recog_handle.rockx_face_recognize(align_img)
+        ret, face_feature = recog_handle.rockx_face_recognize(align_img)
         if ret == RockX.ROCKX_RET_SUCCESS:
             return face_feature, align_img
     return None, None
@@ -111,35 +176,179 @@ def get_all_image(image_path):
     return img_files
 
 
-def import_face(face_db, images_dir):
+# 导入人脸时每个工作进程各自持有一套RockX句柄
+_enroll_handles = None
+
+
+def _init_enroll_worker(device):
+    global _enroll_handles
+    _enroll_handles = (RockX(RockX.ROCKX_MODULE_FACE_DETECTION, target_device=device),
+                       RockX(RockX.ROCKX_MODULE_FACE_LANDMARK_5, target_device=device),
+                       RockX(RockX.ROCKX_MODULE_FACE_RECOGNIZE, target_device=device))
+
+
+def _enroll_image(item):
+    """
+    返回 (状态, NAME, PATH, FACE行, FACE_SOURCE行)，状态为 success/fail/unchanged
+    失败的图片也返回FACE_SOURCE行，没改动之前增量导入不再重复检测
+    """
+    name, image_path, mtime, known_hash, known_status = item
+    try:
+        with open(image_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        # 读不了或已经被删掉的文件和解码失败一样算导入失败，不中断整个导入
+        return 'fail', name, image_path, None, (image_path, name, None, mtime, 'fail')
+    content_hash = hashlib.sha1(data).hexdigest()
+    if content_hash == known_hash:
+        # 只是修改时间变了，内容没变，沿用上次的导入结果
+        status = 'unchanged' if known_status == 'success' else 'fail'
+        return status, name, image_path, None, (image_path, name, content_hash, mtime, known_status)
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    feature, align_img = (None, None) if img is None else get_image_feature(img, _enroll_handles)
+    if feature is None:
+        return 'fail', name, image_path, None, (image_path, name, content_hash, mtime, 'fail')
+    source = (image_path, name, content_hash, mtime, 'success')
+    # RockX的FaceFeature不能pickle，转成(NAME, VERSION, FEATURE, ALIGN_IMAGE)再传回主进程
+    feature_data = np.asarray(feature.feature, dtype=np.float32).tobytes()
+    return 'success', name, image_path, (name, feature.version, feature_data, align_img.tobytes()), source
+
+
+def import_face(face_db, images_dir, jobs=1, device=None, batch_size=64, full=False):
+    """
+    增量导入目录下的人脸图片
+    修改时间和内容哈希都没变的图片直接跳过（包括上次导入失败的），内容变化的图片原地更新，
+    full=True时全部重新导入，上次失败的图片也重新检测。
+    jobs>1时用进程池并行提取特征，结果每batch_size张提交一次数据库
+    """
     image_files = get_all_image(images_dir)
-    image_name_list = list(image_files.keys())
+    known = {} if full else face_db.load_sources()
+    items = []
+    skipped = 0
+    skipped_fail = 0
     for name, image_path in image_files.items():
-        feature, align_img = get_face_feature(image_path)
-        if feature is not None:
-            face_db.insert_face(name, feature, align_img)
-            print('[%d/%d] success import %s ' % (image_name_list.index(name)+1, len(image_name_list), image_path))
-        else:
-            print('[%d/%d] fail import %s' % (image_name_list.index(name)+1, len(image_name_list), image_path))
+        mtime = os.path.getmtime(image_path)
+        known_hash, known_mtime, known_status = known.get(image_path, (None, None, None))
+        if known_mtime == mtime:
+            skipped += 1
+            if known_status == 'fail':
+                skipped_fail += 1
+            continue
+        items.append((name, image_path, mtime, known_hash, known_status))
+    total = len(items)
+    print('skip %d unchanged images (%d failed before, retry with --full_import), %d to import'
+          % (skipped, skipped_fail, total))
+
+    pool = None
+    if jobs > 1:
+        pool = multiprocessing.Pool(jobs, initializer=_init_enroll_worker, initargs=(device,))
+        enrolled = pool.imap_unordered(_enroll_image, items, chunksize=4)
+    else:
+        enrolled = map(_enroll_image, items)
+
+    rows = []
+    sources = []
+    try:
+        for index, (status, name, image_path, row, source) in enumerate(enrolled, start=1):
+            if row is not None:
+                rows.append(row)
+            if source is not None:
+                sources.append(source)
+            if status == 'success':
+                print('[%d/%d] success import %s ' % (index, total, image_path))
+            elif status == 'unchanged':
+                print('[%d/%d] unchanged %s' % (index, total, image_path))
+            else:
+                print('[%d/%d] fail import %s' % (index, total, image_path))
+            if len(sources) >= batch_size:
+                face_db.save_faces(rows, sources)
+                rows = []
+                sources = []
+        face_db.save_faces(rows, sources)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+class FaceLibrary(object):
+    """
+    人脸库
+    加载时把所有人的特征拼成一个连续的float32矩阵，检索时一次矩阵运算算出到所有人的距离
+    """
+
+    def __init__(self, faces):
+        self.faces = faces
+        self.names = list(faces.keys())
+        dim = max([faces[name]['feature'].len for name in self.names] or [0])
+        self.features = np.zeros((len(self.names), dim), dtype=np.float32)
+        for i, name in enumerate(self.names):
+            feature = np.asarray(faces[name]['feature'].feature, dtype=np.float32)
+            self.features[i, :feature.size] = feature
+        self.sq_norms = np.einsum('ij,ij->i', self.features, self.features)
+
+    def __len__(self):
+        return len(self.names)
+
+    def items(self):
+        return self.faces.items()
+
+    def distances(self, feature):
+        """
+        与库中每个人特征的欧氏距离，和rockx_face_similarity的结果一致（越小越相似）
+        """
+        query = np.asarray(feature.feature, dtype=np.float32)
+        sq_distances = self.sq_norms - 2 * (self.features[:, :query.size] @ query) + query @ query
+        return np.sqrt(np.maximum(sq_distances, 0))
+
+    def search(self, feature, threshold=1.0):
+        if not self.names:
+            return None, -1, None
+        distances = self.distances(feature)
+        index = int(np.argmin(distances))
+        min_similarity = float(distances[index])
+        if min_similarity < threshold:
+            target_name = self.names[index]
+            return target_name, min_similarity, self.faces[target_name]
+        return None, -1, None
 
 
 def search_face(face_library, cur_feature):
-    face_recog_handle = RockX(RockX.ROCKX_MODULE_FACE_RECOGNIZE, target_device=args.device)
-    min_similarity = 10.0
-    target_name = None
-    target_face = None
-    for name, face in face_library.items():
-        feature = face['feature']
-        ret, similarity = face_recog_handle.rockx_face_similarity(cur_feature, feature)
-        if similarity < min_similarity:
-            target_name = name
-            min_similarity = similarity
-            target_face = face
-    if min_similarity < 1.0:
-        return target_name, min_similarity, target_face
-    return None, -1, None
+    return face_library.search(cur_feature)
 
 
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="face controlled game")
+    parser.add_argument('-c', '--camera', help="camera index", type=int, default=10)
+    parser.add_argument('-d', '--device', help="target device id", type=str)
+    #parser.add_argument('-b', '--db_file', help="face database path", required=True)
+    parser.add_argument('-b', '--db_file', help="face database path", default="face.db")
+    parser.add_argument('-i', '--image_dir', help="import image dir")
+    parser.add_argument('-j', '--jobs', help="worker processes used to import images", type=int, default=1)
+    parser.add_argument('--full_import', help="re-import every image, not only new or modified ones", action='store_true')
+    parser.add_argument('--pose_process', help="run head pose inference in a separate process", action='store_true')
+    parser.add_argument('--pose_backend', help="pose backend of the separate process, fake needs no RockX and implies --pose_process", choices=['rockx', 'fake'], default='rockx')
+    parser.add_argument('--face_track', help="re-detect faces only around the last face box", action='store_true')
+    parser.add_argument('--redetect_interval', help="frames between full frame face detections when tracking", type=int, default=30)
+    parser.add_argument('--camera_width', help="camera capture width", type=int, default=1280)
+    parser.add_argument('--camera_height', help="camera capture height", type=int, default=720)
+    parser.add_argument('--detect_scale', help="downscale factor of the frame used for face detection", type=float, default=1.0)
+    parser.add_argument('--landmark_interval', help="frames between 68 point landmark inferences, optical flow in between", type=int, default=1)
+    parser.add_argument('--flow_error', help="forward-backward optical flow error (pixels) that forces a new landmark inference", type=float, default=2.0)
+    parser.add_argument('--dirty_rects', help="redraw and update only the screen regions that changed", action='store_true')
+    parser.add_argument('--headless', help="run without window, camera and RockX, driven by scripted input, as fast as possible", action='store_true')
+    parser.add_argument('--frames', help="frames to simulate in headless mode", type=int, default=3600)
+    parser.add_argument('--seed', help="random seed of every game, a new random seed per game if not set", type=int, default=None)
+    parser.add_argument('--record', help="record the seed and per-frame inputs to this file")
+    parser.add_argument('--replay', help="replay the seed and inputs recorded with --record")
+    return parser
+
+
+def uses_rockx(args):
+    """
+    是否需要RockX（NPU）：headless、回放和fake姿态后端都不需要
+    """
+    return not args.headless and args.replay is None and args.pose_backend != 'fake'
 
 
 class HeadPostEstimation():
@@ -148,13 +357,7 @@ class HeadPostEstimation():
     """
 
     def __init__(self):
-        parser = argparse.ArgumentParser(description="face controlled game")
-        parser.add_argument('-c', '--camera', help="camera index", type=int, default=10)
-        parser.add_argument('-d', '--device', help="target device id", type=str)
-        #parser.add_argument('-b', '--db_file', help="face database path", required=True)
-        parser.add_argument('-b', '--db_file', help="face database path", default="face.db")
-        parser.add_argument('-i', '--image_dir', help="import image dir")
-        self.args = parser.parse_args()
+        self.args = build_arg_parser().parse_args()
 
         #self.face_det_handle = RockX(RockX.ROCKX_MODULE_FACE_DETECTION, target_device=self.args.device)
         #self.face_landmark68_handle = RockX(RockX.ROCKX_MODULE_FACE_LANDMARK_68, target_device=self.args.device)
@@ -165,18 +368,75 @@ class HeadPostEstimation():
         self.face_db = FaceDB(self.args.db_file)
         
         if self.args.image_dir is not None:
-            import_face(self.face_db, self.args.image_dir)
+            import_face(self.face_db, self.args.image_dir, self.args.jobs, self.args.device,
+                        full=self.args.full_import)
             exit(0)
         
+        # fake姿态后端不用RockX：姿态推理在独立进程里，没有人脸识别，也就不做身份校验
+        self.rockx = uses_rockx(self.args)
+        if not self.rockx:
+            self.face_library = FaceLibrary({})
+            self.flag = 1
+            self.face_tracker = None
+            self.landmark_flow = None
+            return
+
         # load face from database
-        self.face_library = self.face_db.load_face()
+        self.face_library = FaceLibrary(self.face_db.load_face())
         print("load %d face" % len(self.face_library))
         
         self.flag = 0;
+        # ROI跟踪，只在上一帧人脸附近重新检测
+        # detect_scale<1时在缩小的画面上检测人脸，关键点仍用原分辨率
+        self.face_tracker = None
+        if self.args.face_track or self.args.detect_scale != 1.0:
+            redetect_interval = self.args.redetect_interval if self.args.face_track else 1
+            self.face_tracker = FaceTracker(face_det_handle, redetect_interval,
+                                            detect_scale=self.args.detect_scale)
+        # 关键点每landmark_interval帧运行一次模型，中间帧用光流传播
+        self.landmark_flow = None
+        if self.args.landmark_interval > 1:
+            self.landmark_flow = LandmarkFlow(face_landmark68_handle, self.args.landmark_interval,
+                                              self.args.flow_error)
         #self.m_time = 0;
         #face_landmark5_handle = RockX(RockX.ROCKX_MODULE_FACE_LANDMARK_5, target_device=args.device)
         #face_attr_handle = RockX(RockX.ROCKX_MODULE_FACE_ANALYZE, target_device=args.device)
 
+    def check_face(self, frame, box):
+        """
+        校验玩家身份，只有识别为指定玩家时才允许头部控制
+        """
+        print("get check")
+        in_img_h, in_img_w = frame.shape[:2]
+        face_feature = None
+        target_name = None
+        # face align
+        ret, align_img = face_landmark5_handle.rockx_face_align(frame, in_img_w, in_img_h,
+                                                                RockX.ROCKX_PIXEL_FORMAT_BGR888,
+                                                                box, None)
+
+        # get face feature
+        if ret == RockX.ROCKX_RET_SUCCESS and align_img is not None:
+            ret, face_feature = face_recog_handle.rockx_face_recognize(align_img)
+
+        # search face
+        if ret == RockX.ROCKX_RET_SUCCESS and face_feature is not None:
+            target_name, diff, target_face = search_face(self.face_library, face_feature)
+            print("target_name=%s diff=%s", target_name, str(diff))
+        self.flag = 0
+        if ret == RockX.ROCKX_RET_SUCCESS and face_feature is not None and target_name == "YCZ":
+            self.flag = 1
+            print("get flag")
+
+    def check_frame(self, frame):
+        """
+        对画面中的人脸逐个校验身份（姿态推理放在独立进程时使用）
+        """
+        in_img_h, in_img_w = frame.shape[:2]
+        ret, results = face_det_handle.rockx_face_detect(frame, in_img_w, in_img_h, RockX.ROCKX_PIXEL_FORMAT_BGR888)
+        for result in results:
+            self.check_face(frame, result.box)
+
     def classify_pose(self, video):
         """
         video 表示不断产生图片的生成器
@@ -195,9 +455,18 @@ class HeadPostEstimation():
         frame = img
         show_frame = img
         in_img_h, in_img_w = img.shape[:2]
-        ret, results = face_det_handle.rockx_face_detect(frame, in_img_w, in_img_h, RockX.ROCKX_PIXEL_FORMAT_BGR888)
+        if self.face_tracker is not None:
+            results = self.face_tracker.detect(frame)
+        else:
+            ret, results = face_det_handle.rockx_face_detect(frame, in_img_w, in_img_h, RockX.ROCKX_PIXEL_FORMAT_BGR888)
         
         #ret, results = face_track_handle.rockx_object_track(in_img_w, in_img_h, 3, results)
+        if self.landmark_flow is not None:
+            # 光流传播只跟踪画面中最大的人脸
+            max_face = get_max_face(results)
+            results = [] if max_face is None else [max_face]
+            if max_face is None:
+                self.landmark_flow.reset()
 
         #self.m_time = self.m_time + 1
         #if self.m_time == 20:
@@ -207,31 +476,17 @@ class HeadPostEstimation():
         
             key_pressed = pygame.key.get_pressed()
             if key_pressed[K_c]:
-                print("get check")
-            # face align
-                ret, align_img = face_landmark5_handle.rockx_face_align(frame, in_img_w, in_img_h,
-                                                                 RockX.ROCKX_PIXEL_FORMAT_BGR888,
-                                                                 result.box, None)
-            
-            # get face feature
-                if ret == RockX.ROCKX_RET_SUCCESS and align_img is not None:
-                    ret, face_feature = face_recog_handle.rockx_face_recognize(align_img)
-            
-            # search face
-                if ret == RockX.ROCKX_RET_SUCCESS and face_feature is not None:
-                    target_name, diff, target_face = search_face(self.face_library, face_feature)
-                    print("target_name=%s diff=%s", target_name, str(diff))
-                self.flag = 0
-                if ret == RockX.ROCKX_RET_SUCCESS and face_feature is not None and target_name == "YCZ":
-                    self.flag = 1
-                    print("get flag")
+                self.check_face(frame, result.box)
            
        
         # face landmark
 
-            ret, landmark = face_landmark68_handle.rockx_face_landmark(frame, in_img_w, in_img_h,
-                                                                   RockX.ROCKX_PIXEL_FORMAT_BGR888,
-                                                                   result.box)
+            if self.landmark_flow is not None:
+                ret, landmark = self.landmark_flow.landmark(frame, result.box)
+            else:
+                ret, landmark = face_landmark68_handle.rockx_face_landmark(frame, in_img_w, in_img_h,
+                                                                       RockX.ROCKX_PIXEL_FORMAT_BGR888,
+                                                                       result.box)
             #print(landmark)
 
         # face pose
@@ -260,51 +515,37 @@ class HeadPostEstimation():
         return ret_p, ret_y, ret_r
 
 
-pygame.init()
-pygame.mixer.init()
-
 background_colour = (210, 210, 220)
 RED = (255, 0, 0)
 BLACK = (0, 0, 0)
 GREEN = (0, 255, 0)
 YELLOW = (255, 255, 64)
 min = 0
-modes = pygame.display.list_modes()
 # size = width, height = modes[min][0]//2 - 100, modes[min][1]-100
 size = width, height = 512, 758
-screen = pygame.display.set_mode(size)
-pygame.display.set_caption("飞机大战v1.0")
-
-
-def add_small_enemies(group1, group2, num):
-    for i in range(num):
-        smallenemy = enemy.SmallEnemy(size)
-        group1.add(smallenemy)
-        group2.add(smallenemy)
-
+# 固定时间步长：游戏逻辑每秒推进FPS次，和实际绘制的帧率无关
+FPS = 60
+TICK = 1.0 / FPS
+# 最多落后的时间（秒），超过的部分直接丢弃，防止越追越慢
+MAX_LAG = 0.25
 
-def add_mid_enemies(group1, group2, num):
-    for i in range(num):
-        midenemy = enemy.MidEnemy(size)
-        group1.add(midenemy)
-        group2.add(midenemy)
 
-
-def add_big_enemies(group1, group2, num):
-    for i in range(num):
-        bigenemy = enemy.BigEnemy(size)
-        group1.add(bigenemy)
-        group2.add(bigenemy)
-
-
-def inc_speed(target, inc):
-    for each in target:
-        each.speed += inc
+def init_display(headless=False):
+    """
+    初始化pygame并打开游戏窗口，headless时使用SDL的dummy视频和音频驱动
+    """
+    if headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+    pygame.init()
+    pygame.mixer.init()
+    pygame.display.set_mode(size)
+    pygame.display.set_caption("飞机大战v1.0")
 
 
 def main():
-
-
+    # 游戏画面，--dirty_rects时只重画和提交改动过的区域
+    screen = GameScreen(pygame.display.get_surface(), args.dirty_rects)
 
     # 加载音乐
     #pygame.mixer.music.load("sound/game_music.wav")
@@ -331,314 +572,98 @@ def main():
     supply_sound = pygame.mixer.Sound("sound/supply.wav")
     supply_sound.set_volume(0.4)
 
+    # GameSession.events里的事件对应的音效
+    event_sounds = {"use_bomb": bomb_sound_use, "upgrade": upgrade_sound, "me_down": my_down,
+                    "supply": supply_sound, "bullet": bullet_sound}
+    # 敌机毁灭动画开始时的音效
+    down_sounds = {enemy.SMALL: enemy1_down, enemy.MID: enemy2_down, enemy.BIG: enemy3_down}
+
 
-    #背景图片
-    bg_image1 = pygame.image.load("bgimages/bg1.jpg")
-    bg_image2 = pygame.image.load("bgimages/bg2.jpg")
-    bg_image3 = pygame.image.load("bgimages/bg3.jpg")
-    bg_image4 = pygame.image.load("bgimages/bg4.jpg")
-    bg_image5 = pygame.image.load("bgimages/bg5.jpg")
+    #背景图片，每帧整屏绘制，不透明所以用convert()
+    bg_image1 = assets.load_image("bgimages/bg1.jpg", alpha=False)
+    bg_image2 = assets.load_image("bgimages/bg2.jpg", alpha=False)
+    bg_image3 = assets.load_image("bgimages/bg3.jpg", alpha=False)
+    bg_image4 = assets.load_image("bgimages/bg4.jpg", alpha=False)
+    bg_image5 = assets.load_image("bgimages/bg5.jpg", alpha=False)
+    # 各关卡的背景，第6关沿用第5关
+    backgrounds = {1: bg_image1, 2: bg_image2, 3: bg_image3, 4: bg_image4, 5: bg_image5}
 
     bg = bg_image1
 
     # 得分
-    score = 0
     score_font = pygame.font.Font("font/BrushScriptStd.ttf", 36)
     score_font1 = pygame.font.Font("font/BrushScriptStd.ttf", 24)
-    score_font2 = pygame.font.Font("font/msyh.ttf", 18)
+    # msyh.ttf（微软雅黑）没有随仓库发布，缺少时退回pygame自带字体
+    if os.path.exists("font/msyh.ttf"):
+        score_font2 = pygame.font.Font("font/msyh.ttf", 18)
+    else:
+        score_font2 = pygame.font.Font(None, 18)
+    # HUD文字只在数值变化时重新渲染，固定的标签只渲染一次
+    score_text = CachedText(score_font, "Score:%s", RED)
+    level_text = CachedText(score_font1, "Level:%s", RED)
+    mp_label = score_font1.render("mp: ", True, BLACK)
+    hp_label = score_font1.render("hp: ", True, BLACK)
 
     # 存档判断
     opened = False
 
-    # 默认难度
-    lv = 1
-    lv_dict = {1: 4, 2: 3, 3: 3, 4: 2, 5: 1}
-
     # 是否祝贺
     is_congratulate = False
 
-    # 是否切换难度
-    transform = True
-
-    # 是否激光扫屏
-    sweep = False
-
-    prize_life_num = 0
-    prize_bomb_num = 0
-
     # 暂停图片
     paused = False
-    pause_nor_image = pygame.image.load("images/pause_nor.png").convert_alpha()
-    pause_pressed_image = pygame.image.load("images/pause_pressed.png").convert_alpha()
-    resume_nor_image = pygame.image.load("images/resume_nor.png").convert_alpha()
-    resume_pressed_image = pygame.image.load("images/resume_pressed.png").convert_alpha()
+    pause_nor_image = assets.load_image("images/pause_nor.png")
+    pause_pressed_image = assets.load_image("images/pause_pressed.png")
+    resume_nor_image = assets.load_image("images/resume_nor.png")
+    resume_pressed_image = assets.load_image("images/resume_pressed.png")
     pause_rect = pause_nor_image.get_rect()
     pause_rect.left, pause_rect.top = size[0] - pause_rect.width - 20, 20
     pause_image = pause_nor_image
 
     # 结束界面
-    stop_image = pygame.image.load("images/gameover.png").convert_alpha()
+    stop_image = assets.load_image("images/gameover.png")
     stop_rect = stop_image.get_rect()
     stop_rect.left, stop_rect.top = (size[0] - stop_rect.width) // 2, \
                                     (size[1] - stop_rect.height) // 2 + 250
-    restart_image = pygame.image.load("images/again.png").convert_alpha()
+    restart_image = assets.load_image("images/again.png")
     restart_rect = restart_image.get_rect()
     restart_rect.left, restart_rect.top = (size[0] - stop_rect.width) // 2, \
                                           (size[1] - stop_rect.height) // 2 + 150
 
-    # 索引子弹击中敌人图片
-    small_destroy_index = 0
-    mid_destroy_index = 0
-    big_destroy_index = 0
+    # 我方飞机毁灭和奖励生命的动画帧
     my_destroy_index = 0
     life_index = 0
 
-    # 生成我方飞机
-    myplane = plane.Plane(size)
-
-    # 生成防护罩(shield)
-    shields = shield.Shield()
+    # 每局的种子：回放时用记录里这一局的种子，指定--seed时每局都用它，否则每局随机生成
+    if replay is not None:
+        seed = replay.round()
+        if seed is None:
+            print("replay: finished")
+            return
+    elif args.seed is not None:
+        seed = args.seed
+    else:
+        seed = rng.new_seed()
+    if recorder is not None:
+        recorder.round(seed)
+
+    # 游戏的状态和规则都在GameSession里，这里只把输入换成动作、绘制画面和播放音效
+    session = GameSession(size)
+    session.reset(seed)
 
     # 我方生命数量
-    life_num = 8
-    life_image = pygame.image.load("images/life.png").convert_alpha()
+    life_image = assets.load_image("images/life.png")
     life_rect = life_image.get_rect()
 
     # 自带炸弹
-    bomb_image = pygame.image.load("images/bomb.png").convert_alpha()
+    bomb_image = assets.load_image("images/bomb.png")
     bomb_rect = bomb_image.get_rect()
     bomb_rect.left, bomb_rect.top = 10, size[1] - bomb_rect.height - 10
-    bomb_num = 10
     bomb_font = pygame.font.Font("font/font.ttf", 35)
-
-    # 补给定时
-    supply_bomb = supply.Bomb(size)
-    supply_bullet = supply.Bullet(size)
-
-    SUPPLY_TIME = USEREVENT
-    pygame.time.set_timer(SUPPLY_TIME, 25 * 1000)
-
-    # ==========================================================
-    enemies = pygame.sprite.Group()
-    # 生成小型敌机
-    smallenemies = pygame.sprite.Group()
-    add_small_enemies(smallenemies, enemies, 14)
-
-    # 生成中型敌机
-    midenemies = pygame.sprite.Group()
-    add_mid_enemies(midenemies, enemies, 4)
-
-    # 生成大型敌机
-    bigenemies = pygame.sprite.Group()
-    add_big_enemies(bigenemies, enemies, 2)
-
-    # 生成boss
-    bosses = pygame.sprite.Group()
-    boss = enemy.Boss(size)
-    enemies.add(boss)
-    bosses.add(boss)
-    # ==========================================================
-
-    # 敌机毁灭时奖励补给
-    _prize_bomb = pygame.sprite.Group()
-    _prize_bullet = pygame.sprite.Group()
-    _prize_life = pygame.sprite.Group()
-
-    # 敌机boss毁灭时奖励
-    _prize_boss = pygame.sprite.Group()
-
-    # 加强子弹定时器
-    DOUBLE_BULLET_TIME = USEREVENT + 1
-    # 标志是否使用加强子弹
-    is_double = False
-
-    # 无敌计时器
-    INVINCIBLE_TIME = USEREVENT + 2
-
-    # 生成我方扫屏激光
-    my_lasers = []
-    my_lasers_index = 0
-    MY_LASERS_NUM = 1
-    for i in range(MY_LASERS_NUM):
-        my_lasers.append(bullet.My_lasers())
-
-    # 激光1(直)
-    lasers1 = []
-    lasers1_index = 0
-    LASERS1_NUM = 2
-    for i in range(LASERS1_NUM // 2):
-        lasers1.append(enemy_bullet.Lasers1(size, (boss.rect.centerx - 65, boss.rect.centery)))
-        lasers1.append(enemy_bullet.Lasers1(size, (boss.rect.centerx + 65, boss.rect.centery)))
-
-    # 子弹1
-    bullet1 = []
-    bullet1_index = 0
-    BULLET1_NUM = 5
-    for i in range(BULLET1_NUM):
-        bullet1.append(bullet.Bullet1(myplane.rect.midtop))
-    # 子弹2
-    bullet2 = []
-    bullet2_index = 0
-    BULLET2_NUM = 12
-    for i in range(BULLET2_NUM // 2):
-        bullet2.append(bullet.Bullet2((myplane.rect.centerx - 33, myplane.rect.centery)))
-        bullet2.append(bullet.Bullet2((myplane.rect.centerx + 30, myplane.rect.centery)))
-    # 子弹3
-    bullet3 = []
-    bullet3_index = 0
-    BULLET3_NUM = 18
-    for i in range(BULLET3_NUM // 3):
-        bullet3.append(bullet.Bullet2((myplane.rect.centerx - 33, myplane.rect.centery)))
-        bullet3.append(bullet.Bullet1(myplane.rect.midtop))
-        bullet3.append(bullet.Bullet2((myplane.rect.centerx + 30, myplane.rect.centery)))
-    # 子弹4
-    bullet4 = []
-    bullet4_index = 0
-    BULLET4_NUM = 24
-    for i in range(BULLET4_NUM // 4):
-        bullet4.append(bullet.Bullet1((myplane.rect.centerx - 33, myplane.rect.centery)))
-        bullet4.append(bullet.Bullet2((myplane.rect.centerx - 15, myplane.rect.centery)))
-        bullet4.append(bullet.Bullet2((myplane.rect.centerx + 15, myplane.rect.centery)))
-        bullet4.append(bullet.Bullet1((myplane.rect.centerx + 30, myplane.rect.centery)))
-    # 子弹5
-    bullet5 = []
-    bullet5_index = 0
-    BULLET5_NUM = 30
-    for i in range(BULLET5_NUM // 5):
-        bullet5.append(bullet.Bullet4((myplane.rect.centerx - 33, myplane.rect.centery)))
-        bullet5.append(bullet.Bullet3((myplane.rect.centerx - 15, myplane.rect.centery)))
-        bullet5.append(bullet.Bullet2(myplane.rect.midtop))
-        bullet5.append(bullet.Bullet3((myplane.rect.centerx + 15, myplane.rect.centery)))
-        bullet5.append(bullet.Bullet4((myplane.rect.centerx + 30, myplane.rect.centery)))
-    # 子弹6
-    bullet6 = []
-    bullet6_index = 0
-    BULLET6_NUM = 36
-    for i in range(BULLET6_NUM // 6):
-        bullet6.append(bullet.Bullet1((myplane.rect.centerx - 33, myplane.rect.centery)))
-        bullet6.append(bullet.Bullet2((myplane.rect.centerx - 22, myplane.rect.centery)))
-        bullet6.append(bullet.Bullet3((myplane.rect.centerx - 10, myplane.rect.centery)))
-        bullet6.append(bullet.Bullet3((myplane.rect.centerx + 10, myplane.rect.centery)))
-        bullet6.append(bullet.Bullet2((myplane.rect.centerx + 22, myplane.rect.centery)))
-        bullet6.append(bullet.Bullet1((myplane.rect.centerx + 30, myplane.rect.centery)))
-
-    # 子弹7
-    bullet7 = []
-    bullet7_index = 0
-    BULLET7_NUM = 42
-    for i in range(BULLET7_NUM // 7):
-        bullet7.append(bullet.Bullet4((myplane.rect.centerx - 33, myplane.rect.centery)))
-        bullet7.append(bullet.Bullet1((myplane.rect.centerx - 22, myplane.rect.centery)))
-        bullet7.append(bullet.Bullet2((myplane.rect.centerx - 10, myplane.rect.centery)))
-        bullet7.append(bullet.Bullet3(myplane.rect.midtop))
-        bullet7.append(bullet.Bullet3((myplane.rect.centerx + 10, myplane.rect.centery)))
-        bullet7.append(bullet.Bullet1((myplane.rect.centerx + 22, myplane.rect.centery)))
-        bullet7.append(bullet.Bullet4((myplane.rect.centerx + 30, myplane.rect.centery)))
-    # 子弹8
-    bullet8 = []
-    bullet8_index = 0
-    BULLET8_NUM = 48
-    for i in range(BULLET8_NUM // 8):
-        bullet8.append(bullet.Bullet4((myplane.rect.centerx - 45, myplane.rect.centery)))
-        bullet8.append(bullet.Bullet1((myplane.rect.centerx - 35, myplane.rect.centery)))
-        bullet8.append(bullet.Bullet2((myplane.rect.centerx - 24, myplane.rect.centery)))
-        bullet8.append(bullet.Bullet3((myplane.rect.centerx - 10, myplane.rect.centery)))
-        bullet8.append(bullet.Bullet3((myplane.rect.centerx + 10, myplane.rect.centery)))
-        bullet8.append(bullet.Bullet2((myplane.rect.centerx + 22, myplane.rect.centery)))
-        bullet8.append(bullet.Bullet1((myplane.rect.centerx + 30, myplane.rect.centery)))
-        bullet8.append(bullet.Bullet4((myplane.rect.centerx + 41, myplane.rect.centery)))
-        # 子弹9
-    bullet9 = []
-    bullet9_index = 0
-    BULLET9_NUM = 54
-    for i in range(BULLET9_NUM // 9):
-        bullet9.append(bullet.Bullet1((myplane.rect.centerx - 43, myplane.rect.centery)))
-        bullet9.append(bullet.Bullet2((myplane.rect.centerx - 35, myplane.rect.centery)))
-        bullet9.append(bullet.Bullet2((myplane.rect.centerx - 24, myplane.rect.centery)))
-        bullet9.append(bullet.Bullet3((myplane.rect.centerx - 10, myplane.rect.centery)))
-        bullet9.append(bullet.Bullet3(myplane.rect.midtop))
-        bullet9.append(bullet.Bullet3((myplane.rect.centerx + 10, myplane.rect.centery)))
-        bullet9.append(bullet.Bullet2((myplane.rect.centerx + 21, myplane.rect.centery)))
-        bullet9.append(bullet.Bullet2((myplane.rect.centerx + 32, myplane.rect.centery)))
-        bullet9.append(bullet.Bullet1((myplane.rect.centerx + 41, myplane.rect.centery)))
-    # 子弹0
-    bullet0 = []
-    bullet0_index = 0
-    BULLET0_NUM = 66
-    for i in range(BULLET0_NUM // 11):
-        bullet0.append(bullet.Bullet4((myplane.rect.centerx - 55, myplane.rect.centery)))
-        bullet0.append(bullet.Bullet1((myplane.rect.centerx - 44, myplane.rect.centery)))
-        bullet0.append(bullet.Bullet2((myplane.rect.centerx - 34, myplane.rect.centery)))
-        bullet0.append(bullet.Bullet2((myplane.rect.centerx - 23, myplane.rect.centery)))
-        bullet0.append(bullet.Bullet3((myplane.rect.centerx - 10, myplane.rect.centery)))
-        bullet0.append(bullet.Bullet3(myplane.rect.midtop))
-        bullet0.append(bullet.Bullet3((myplane.rect.centerx + 10, myplane.rect.centery)))
-        bullet0.append(bullet.Bullet2((myplane.rect.centerx + 21, myplane.rect.centery)))
-        bullet0.append(bullet.Bullet2((myplane.rect.centerx + 30, myplane.rect.centery)))
-        bullet0.append(bullet.Bullet1((myplane.rect.centerx + 41, myplane.rect.centery)))
-        bullet0.append(bullet.Bullet4((myplane.rect.centerx + 50, myplane.rect.centery)))
-
-    # 飞弹
-    feidan = []
-    feidan_index = 0
-    FEIDAN_NUM = 12
-    for i in range(FEIDAN_NUM // 2):
-        feidan.append(bullet.Bullet5((myplane.rect.centerx - 55, myplane.rect.centery)))
-        feidan.append(bullet.Bullet5((myplane.rect.centerx + 50, myplane.rect.centery)))
-
-    # boss尾气
-    boss_bullet = []
-    boss_bullet_index = 0
-    BOSS_BULLET_NUM = 2
-    for i in range(BOSS_BULLET_NUM // 2):
-        boss_bullet.append(enemy_bullet.Bullet(size))
-        boss_bullet.append(enemy_bullet.Bullet(size))
-    # ==========================================================
-    boss_bullets = []
-    # boss子弹1
-    boss_bullet1 = []
-    boss_bullet1_index = 0
-    BOSS_BULLET1_NUM = 4
-    for i in range(BOSS_BULLET1_NUM // 4):
-        boss_bullet1.append(enemy_bullet.Bullet_a(size))
-        boss_bullet1.append(enemy_bullet.Bullet1(size))
-        boss_bullet1.append(enemy_bullet.Bullet1(size))
-        boss_bullet1.append(enemy_bullet.Bullet_a(size))
-
-    # boss子弹2
-    boss_bullet2 = []
-    boss_bullet2_index = 0
-    BOSS_BULLET2_NUM = 4
-    for i in range(BOSS_BULLET2_NUM // 4):
-        boss_bullet2.append(enemy_bullet.Bullet_a(size))
-        boss_bullet2.append(enemy_bullet.Bullet2(size))
-        boss_bullet2.append(enemy_bullet.Bullet2(size))
-        boss_bullet2.append(enemy_bullet.Bullet_a(size))
-
-    # boss子弹3
-    boss_bullet3 = []
-    boss_bullet3_index = 0
-    BOSS_BULLET3_NUM = 4
-    for i in range(BOSS_BULLET3_NUM // 4):
-        boss_bullet3.append(enemy_bullet.Bullet_a(size))
-        boss_bullet3.append(enemy_bullet.Bullet3(size))
-        boss_bullet3.append(enemy_bullet.Bullet3(size))
-        boss_bullet3.append(enemy_bullet.Bullet_a(size))
+    bomb_text = CachedText(bomb_font, "×%s", BLACK)
 
     # 用于切换图片
     switch_image = True
-    # 用于延迟帧率
-    delay = 10
-    # 用于计boss能量
-    _delay = 0
-
-    # 用于计算我方mp
-    # m为随着等级提升而增加的能量上限
-    m = 1000
-    mp = m // 20
-
-    # 暂停敌机移动
-    is_move = True
 
     running = True
 
@@ -646,1217 +671,512 @@ def main():
     #face_detector = MyFaceDetector()
     # 打开摄像头
 
-    cap = cv2.VideoCapture(10)
-    cap.set(3, 1280)
-    cap.set(4, 720)
+    if replay is not None:
+        # 回放时头部姿态从记录里读
+        pilot = None
+        cap = None
+        head_post = None
+    elif args.headless:
+        # 没有摄像头和RockX，用脚本输入控制飞机
+        pilot = ScriptedPilot()
+        cap = None
+        head_post = None
+    else:
+        pilot = None
+        # 后台线程采集，游戏循环只取最新一帧
+        cap = CameraCapture(10, args.camera_width, args.camera_height).start()
+        head_post = HeadPostEstimation()
     last_face_feature = None
-
-    def generate_image():
-        while True:
-            # frame_rgb即视频的一帧数据
-            ret, frame_rgb = cap.read()
-            # 按q键即可退出
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-            if frame_rgb is None:
-                break
-            frame_bgr = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2BGR)
-            #yield frame_bgr
-            return frame_bgr
-        #cap.release()
-        #cv2.destroyAllWindows()
-
-    head_post = HeadPostEstimation()
-    head_angle_yaw_ref = 0
-    head_angle_pitch_ref = 0
+    pose_engine = None
+    # 头部姿态换成动作
+    head_control = HeadControl()
 
     imindex = 0
-    #inc_speed(smallenemies,2)
-    while running:
-        #screen.fill(background_colour)
-
-        screen.blit(bg,(0,0))
-        # 事件循环
-        for event in pygame.event.get():
-            if event.type == QUIT:
-                pygame.quit()
-                sys.exit()
-
-            elif life_num >= 0:
-                if event.type == MOUSEBUTTONDOWN:
-                    if event.button == 1 and pause_rect.collidepoint(event.pos):
-                        paused = not paused
-                        if paused:
-                            #pygame.mixer.music.pause()
-                            pygame.mixer.pause()
-                        else:
-                            #pygame.mixer.music.unpause()
-                            pygame.mixer.unpause()
+    # 摄像头得到的最近一次头部姿态(pitch, yaw, roll)，追赶帧直接沿用，不重复采集和推理
+    camera_pose = (0, 0, 0)
+    clock = pygame.time.Clock()
+    # 还没有模拟的实际时间（秒）
+    lag = 0.0
+    # headless时统计模拟速度，并记下每帧observation的摘要，和simulate.py --check对照
+    frame_count = 0
+    trace = hashlib.sha1()
+    start_time = time.perf_counter()
+    # 游戏循环里blit的图片都应该已经转换成显示Surface的像素格式
+    for path, alpha, scale, angle in assets.unconverted():
+        print("warning: %s is not converted to the display pixel format" % path)
+    # 重新开始游戏时先结束这一局、释放摄像头和姿态推理进程，再开始新的一局
+    restart = False
+    try:
+        while running:
+            #screen.fill(background_colour)
+
+            screen.clear(bg)
+            # 这一帧的输入，回放时键盘和鼠标事件都来自记录
+            if replay is not None:
+                pygame.event.clear()
+                inputs = replay.frame()
+                if inputs is None:
+                    print("replay: finished, score %d" % session.score)
+                    return
+                events, key_pressed = inputs
+            else:
+                events, key_pressed = pygame.event.get(), pygame.key.get_pressed()
+                if recorder is not None:
+                    recorder.frame(events, key_pressed)
+            # 这一帧交给GameSession的动作
+            actions = []
+            # 事件循环
+            for event in events:
+                if event.type == QUIT:
+                    pygame.quit()
+                    sys.exit()
 
-                elif event.type == MOUSEMOTION:
-                    if pause_rect.collidepoint(event.pos):
-                        if paused:
-                            pause_image = resume_pressed_image
-                        else:
-                            pause_image = pause_pressed_image
-                    else:
-                        if paused:
-                            pause_image = resume_nor_image
-                        else:
-                            pause_image = pause_nor_image
-
-                elif not paused and event.type == KEYDOWN:
-                    if bomb_num and event.key == K_SPACE:
-                        bomb_sound_use.play()
-                        bomb_num -= 1
-                        if mp < m - m // 20:
-                            mp += m // 20
+                elif not session.done:
+                    if event.type == MOUSEBUTTONDOWN:
+                        if event.button == 1 and pause_rect.collidepoint(event.pos):
+                            paused = not paused
+                            if paused:
+                                #pygame.mixer.music.pause()
+                                pygame.mixer.pause()
+                            else:
+                                #pygame.mixer.music.unpause()
+                                pygame.mixer.unpause()
+
+                    elif event.type == MOUSEMOTION:
+                        if pause_rect.collidepoint(event.pos):
+                            if paused:
+                                pause_image = resume_pressed_image
+                            else:
+                                pause_image = pause_pressed_image
                         else:
-                            mp = m
-
-                        for each in enemies:
-                            if each in bosses:
-                                if each.rect.bottom == each.rect.height:
-                                    each.energy -= 50
-                                    if each.energy <= 0:
-                                        each.active = False
+                            if paused:
+                                pause_image = resume_nor_image
                             else:
-                                if each.rect.bottom > 0:
-                                    each.active = False
-                        if bomb_num <= 0:
-                            bomb_num = 0
-
-                elif event.type == SUPPLY_TIME:
-                    if choice([True, False]):
-                        supply_bomb.reset()
-                    else:
-                        supply_bullet.reset()
+                                pause_image = pause_nor_image
 
-                elif event.type == DOUBLE_BULLET_TIME:
-                    is_double = False
-                    pygame.time.set_timer(DOUBLE_BULLET_TIME, 0)
+                    elif not paused and event.type == KEYDOWN:
+                        if event.key == K_SPACE:
+                            actions.append(BOMB)
 
-                elif event.type == INVINCIBLE_TIME:
-                    myplane.invincible = False
-                    myplane.blink = False
-                    pygame.time.set_timer(INVINCIBLE_TIME, 0)
+                elif event.type == MOUSEBUTTONDOWN:
+                    if event.button == 1 and stop_rect.collidepoint(event.pos):
+                        pygame.quit()
+                        sys.exit()
 
-            elif event.type == MOUSEBUTTONDOWN:
-                if event.button == 1 and stop_rect.collidepoint(event.pos):
-                    pygame.quit()
-                    sys.exit()
+                    elif event.button == 1 and restart_rect.collidepoint(event.pos):
+                        restart = True
+                        break
+            if restart:
+                break
 
-                elif event.button == 1 and restart_rect.collidepoint(event.pos):
-                    cap.release()
-                    cv2.destroyAllWindows()
-                    main()
-        
-        
-        # 难度设置
-        if lv == 1 and score > 500:
-            if transform:
-                # 增加2架小型敌机,1架中型敌机,1架大型敌机
-                add_small_enemies(smallenemies, enemies, 3)
-                add_mid_enemies(midenemies, enemies, 2)
-                add_big_enemies(bigenemies, enemies, 1)
-                # 增加小型敌机速度
-                inc_speed(smallenemies,1)
-                #inc_speed(smallenemies, 3)
-                transform = False
-                # 去掉所有其他敌机
-                is_move = False
-                boss.reset()
-
-            if not boss.active:
-                upgrade_sound.play()
-                lv = 2
-                is_move = True
-
-                # 复位到原地等待reset()
-                boss._return()
-                transform = True
-                score += 200
-                bg = bg_image2
-                shields.active = False
-                myplane.invincible = False
-                m += 200
-                mp = m // 20
-
-        elif lv == 2 and score > 1500:
-            if transform:
-                add_small_enemies(smallenemies, enemies, 2)
-                add_mid_enemies(midenemies, enemies, 2)
-                add_big_enemies(bigenemies, enemies, 1)
-                # 增加小型敌机速度
-                inc_speed(smallenemies, 1)
-                inc_speed(midenemies, 1)
-                inc_speed(bigenemies, 1)
-                transform = False
-
-                is_move = False
-                boss.reset()
-
-            if not boss.active:
-                upgrade_sound.play()
-                lv = 3
-                is_move = True
-                boss._return()
-                transform = True
-                score += 500
-                bg = bg_image3
-                enemy.BigEnemy.energy += 10
-                shields.active = False
-                myplane.invincible = False
-                m += 500
-                mp = m // 20
-
-        elif lv == 3 and score > 4500:
-            if transform:
-                # 增加3架小型敌机,2架中型敌机,1架大型敌机
-                add_small_enemies(smallenemies, enemies, 2)
-                add_mid_enemies(midenemies, enemies, 2)
-                add_big_enemies(bigenemies, enemies, 1)
-                # 增加小型敌机速度
-                inc_speed(smallenemies, 2)
-                inc_speed(midenemies, 1)
-                transform = False
-
-                is_move = False
-                boss.reset()
-
-            if not boss.active:
-                upgrade_sound.play()
-                lv = 4
-                is_move = True
-                boss._return()
-                transform = True
-                score += 800
-                bg = bg_image4
-                enemy.MidEnemy.energy += 5
-                enemy.BigEnemy.energy += 10
-                shields.active = False
-                myplane.invincible = False
-                m += 1000
-                mp = m // 20
-
-        elif lv == 4 and score > 13500:
-            if transform:
-                # 增加4架小型敌机,2架中型敌机,1架大型敌机
-                add_small_enemies(smallenemies, enemies, 2)
-                add_mid_enemies(midenemies, enemies, 2)
-                add_big_enemies(bigenemies, enemies, 1)
-                # 增加小型敌机速度
-                inc_speed(smallenemies, 2)
-                inc_speed(midenemies, 1)
-                inc_speed(bigenemies, 1)
-                transform = False
-
-                is_move = False
-                boss.reset()
-
-            if not boss.active:
-                upgrade_sound.play()
-                lv = 5
-                is_move = True
-                boss._return()
-                transform = True
-                score += 1100
-                bg = bg_image5
-                enemy.MidEnemy.energy += 5
-                enemy.BigEnemy.energy += 10
-                shields.active = False
-                myplane.invincible = False
-                m += 2000
-                mp = m // 20
-
-        elif lv == 5 and score > 40500:
-            if transform:
-                add_mid_enemies(midenemies, enemies, 5)
-                add_big_enemies(bigenemies, enemies, 3)
-                for each in smallenemies:
-                    each.speed = 1
-                enemy.BigEnemy.energy = 220
-                enemy.MidEnemy.energy = 50
-                # 减少敌机速度
-                inc_speed(midenemies, -2)
-                inc_speed(bigenemies, -2)
-                transform = False
-
-                is_move = False
-                boss.reset()
-
-            if not boss.active:
-                upgrade_sound.play()
-                lv = 6
-                is_move = True
-                boss._return()
-                transform = True
-                score += 1400
-                # bg = bg_image6
-                shields.active = False
-                myplane.invincible = False
-                m += 3000
-                mp = m // 20
-
-        elif lv == 6 and score > 1000000:
-            if transform:
-                for each in smallenemies:
-                    each.speed = 8
-
-                enemy.BigEnemy.energy -= 20
-                enemy.MidEnemy.energy -= 100
-                add_small_enemies(smallenemies, enemies, 2)
-                add_mid_enemies(midenemies, enemies, 1)
-                inc_speed(midenemies, 3)
-                inc_speed(bigenemies, 3)
-                transform = False
-                is_move = False
-                boss.reset()
-
-            if not boss.active:
-                upgrade_sound.play()
-                is_move = True
-                boss._return()
-                transform = True
-                score += 10000
-                # bg = bg_image6
-                shields.active = False
-                myplane.invincible = False
-                m += 5000
-                mp = m // 20
-
-        # 更新分数
-        score_text = score_font.render("Score:%s" % str(score), True, RED)
-        screen.blit(score_text, (15, 8))
-        # 更新关卡
-        level_text = score_font1.render("Level:%s" % str(lv), True, RED)
-        screen.blit(level_text, (15, 45))
-        # 更新暂停按钮
-        screen.blit(pause_image, pause_rect)
-
-        clock = pygame.time.Clock()
-
-        if not paused and life_num >= 0:
-            # 绘制我方飞机数量
-            for i in range(life_num):
-                life_rect.left, life_rect.top = size[0] - (i + 1) * life_rect.width, \
-                                                size[1] - life_rect.height - 10
-                screen.blit(life_image, life_rect)
-
-            # 更新炸弹数量
-            bomb_text = bomb_font.render("×%s" % str(bomb_num), True, BLACK)
-            screen.blit(bomb_text, (75, size[1] - bomb_rect.height + 2))
-            # 生成炸弹
-            screen.blit(bomb_image, bomb_rect)
-
-            
-            #获取键盘事件
-            key_pressed = pygame.key.get_pressed()
-            if key_pressed[K_w] or key_pressed[K_UP]:
-                myplane.move_up()
-            elif key_pressed[K_s] or key_pressed[K_DOWN]:
-                myplane.move_down()
-            elif key_pressed[K_a] or key_pressed[K_LEFT]:
-                myplane.move_left()
-            elif key_pressed[K_d] or key_pressed[K_RIGHT]:
-                myplane.move_right()
-            #启动我方飞机防护罩
-            elif key_pressed[K_RETURN]:
-                if _mp_remain == 1:
-                    shields.reset()
-                    mp = 50
-            elif key_pressed[K_x]:
-                 cap.release()
-                 cv2.destroyAllWindows()
-                 
-                 main()
-            
-
-            head_angle_pitch=0
-            head_angle_yaw=0
-            head_angle_roll=0
-            imindex+=1
-            #获取角度
-            if imindex == 2: 
-                img = generate_image()
-                #print(img)
-                head_angle_pitch, head_angle_yaw, head_angle_roll = head_post.classify_pose(video=img)
-                imindex = 0
-            #获取键盘事件
-            key_pressed = pygame.key.get_pressed()
-            #更新头部初始角度
-            if key_pressed[K_r]:
-                head_angle_pitch_ref = head_angle_pitch;
-                head_angle_yaw_ref = head_angle_yaw;
-            
-            
-            if head_angle_yaw < head_angle_yaw_ref-2 and head_angle_yaw != 0:
-                myplane.move_left() # 由于摄像头演示中镜面关系，实际使用中请设置为myplane.move_right()
-            elif head_angle_yaw > head_angle_yaw_ref+2 and head_angle_yaw != 0:
-                myplane.move_right() # 由于摄像头演示中镜面关系，实际使用中请设置为myplane.move_left()
-            elif head_angle_pitch < head_angle_pitch_ref-1 and head_angle_pitch != 0:
-                myplane.move_up()
-            elif head_angle_pitch > head_angle_pitch_ref+1 and head_angle_pitch != 0:
-                myplane.move_down()
-            
-            
-            lips_distance = 0
-            
-            # 张嘴就是炸弹，dis_control<0.045 为闭嘴
-            if lips_distance < 0.045:
-                flag = 1
-            
-            
-            
-            
-            if bomb_num and lips_distance > 0.055 and flag == 1:
-                flag = 0
-                bomb_sound_use.play()
-                bomb_num -= 1
-                if mp < m - m // 20:
-                    mp += m // 20
+            # 更新分数
+            screen.blit(score_text.render(session.score), (15, 8))
+            # 更新关卡
+            screen.blit(level_text.render(session.lv), (15, 45))
+            # 更新暂停按钮
+            screen.blit(pause_image, pause_rect)
+
+            if not paused and not session.done:
+                # 绘制我方飞机数量
+                for i in range(session.life_num):
+                    life_rect.left, life_rect.top = size[0] - (i + 1) * life_rect.width, \
+                                                    size[1] - life_rect.height - 10
+                    screen.blit(life_image, life_rect)
+
+                # 更新炸弹数量
+                screen.blit(bomb_text.render(session.bomb_num), (75, size[1] - bomb_rect.height + 2))
+                # 生成炸弹
+                screen.blit(bomb_image, bomb_rect)
+
+
+                #获取键盘事件
+                if key_pressed[K_w] or key_pressed[K_UP]:
+                    actions.append(UP)
+                elif key_pressed[K_s] or key_pressed[K_DOWN]:
+                    actions.append(DOWN)
+                elif key_pressed[K_a] or key_pressed[K_LEFT]:
+                    actions.append(LEFT)
+                elif key_pressed[K_d] or key_pressed[K_RIGHT]:
+                    actions.append(RIGHT)
+                #启动我方飞机防护罩
+                elif key_pressed[K_RETURN]:
+                    actions.append(SHIELD)
+                elif key_pressed[K_x]:
+                     restart = True
+                     break
+
+
+                head_angle_pitch=0
+                head_angle_yaw=0
+                head_angle_roll=0
+                lips_distance = 0
+                if replay is not None:
+                    head_angle_pitch, head_angle_yaw, head_angle_roll, lips_distance = replay.pose()
+                elif pilot is not None:
+                    head_angle_pitch, head_angle_yaw, head_angle_roll, lips_distance = pilot.step()
                 else:
-                    mp = m
-
-                for each in enemies:
-                    if each in bosses:
-                        if each.rect.bottom == each.rect.height:
-                            each.energy -= 50
-                            if each.energy <= 0:
-                                each.active = False
+                    # 采集和推理跟着绘制的帧走，追赶帧只推进模拟，沿用上一次的姿态
+                    if screen.drawing:
+                        imindex+=1
+                        #获取角度
+                        if imindex == 2:
+                            img = cap.read()
+                            #print(img)
+                            if img is not None:
+                                if head_post.args.pose_process or not head_post.rockx:
+                                    # 推理放在独立进程，这里只投递画面
+                                    if pose_engine is None:
+                                        if head_post.args.pose_backend == 'fake':
+                                            pose_backend = FakePoseBackend()
+                                        else:
+                                            pose_backend = RockXPoseBackend(head_post.args.device,
+                                                                            head_post.args.face_track,
+                                                                            head_post.args.redetect_interval,
+                                                                            head_post.args.detect_scale,
+                                                                            head_post.args.landmark_interval,
+                                                                            head_post.args.flow_error)
+                                        pose_engine = PoseEngine(img.shape, pose_backend).start()
+                                    pose_engine.submit(img)
+                                    if head_post.rockx and pygame.key.get_pressed()[K_c]:
+                                        head_post.check_frame(img)
+                                else:
+                                    camera_pose = head_post.classify_pose(video=img)
+                                    # classify_pose用imshow显示画面，需要waitKey刷新窗口
+                                    cv2.waitKey(1)
+                            imindex = 0
+                        if pose_engine is not None:
+                            # 一直取走推理结果，身份校验没通过（flag<=0）时丢弃并把角度归零，飞机不再移动
+                            pose = pose_engine.poll()
+                            if head_post.flag <= 0:
+                                camera_pose = (0, 0, 0)
+                            elif pose is not None:
+                                camera_pose = tuple(pose[:3])
+                    head_angle_pitch, head_angle_yaw, head_angle_roll = camera_pose
+                if recorder is not None:
+                    recorder.pose((head_angle_pitch, head_angle_yaw, head_angle_roll, lips_distance))
+                #更新头部初始角度
+                if key_pressed[K_r]:
+                    head_control.calibrate(head_angle_pitch, head_angle_yaw)
+
+                # 转头移动飞机，张嘴放炸弹
+                actions.extend(head_control.actions(head_angle_pitch, head_angle_yaw, head_angle_roll,
+                                                    lips_distance))
+
+                # 推进一帧
+                observation = session.step(actions)[0]
+                if args.headless:
+                    trace.update(observation.tobytes())
+                for name in session.events:
+                    event_sounds[name].play()
+                # 升级后下一帧换背景
+                bg = backgrounds.get(session.lv, bg)
+
+                lv = session.lv
+                delay = session.delay
+                myplane = session.myplane
+                shields = session.shields
+                boss = session.boss
+
+                # 更新我方飞机
+                if not myplane.blink:
+                    if not (delay % 5):
+                        switch_image = not switch_image
+
+                    if myplane.active:
+                        if switch_image:
+                            screen.blit(myplane.image1, myplane.rect)
+                        else:
+                            screen.blit(myplane.image2, myplane.rect)
                     else:
-                        if each.rect.bottom > 0:
-                            each.active = False
-                if bomb_num <= 0:
-                    bomb_num = 0
-        
-            
-            # 更新我方飞机
-            if not myplane.blink:
-                if not (delay % 5):
-                    switch_image = not switch_image
-
-                if myplane.active:
+                        # 游戏结束
+                        if not (delay % 3):
+                            screen.blit(myplane.destroy_image[my_destroy_index], myplane.rect)
+                            my_destroy_index = (my_destroy_index + 1) % 4
+                else:
+                    # 说明发生碰撞但active非False
+                    # 复活时候闪烁
+                    if not (delay % 30):
+                        switch_image = not switch_image
                     if switch_image:
                         screen.blit(myplane.image1, myplane.rect)
                     else:
-                        screen.blit(myplane.image2, myplane.rect)
-                else:
-                    # 游戏结束
-                    if not (delay % 3):
-                        if my_destroy_index == 0:
-                            my_down.play()
-                        screen.blit(myplane.destroy_image[my_destroy_index], myplane.rect)
-                        my_destroy_index = (my_destroy_index + 1) % 4
-            else:
-                # 说明发生碰撞但active非False
-                # 复活时候闪烁
-                if not (delay % 30):
-                    switch_image = not switch_image
-                if switch_image:
-                    screen.blit(myplane.image1, myplane.rect)
-                else:
-                    screen.blit(myplane.destroy_image[-1], myplane.rect)
+                        screen.blit(myplane.destroy_image[-1], myplane.rect)
 
-            # 更新能量mp
-            _mp_remain = mp / m
-            if _mp_remain == 1:
-                mp_colour = GREEN
-            else:
-                mp_colour = YELLOW
+                # 更新能量mp
+                _mp_remain = session.mp / session.m
+                if _mp_remain == 1:
+                    mp_colour = GREEN
+                else:
+                    mp_colour = YELLOW
 
-            pygame.draw.line(screen, mp_colour, (45, size[1] - 80), (45 + 60 * _mp_remain, size[1] - 80), 15)
+                screen.line(mp_colour, (45, size[1] - 80), (45 + 60 * _mp_remain, size[1] - 80), 15)
 
-            e_text = score_font1.render("mp: ", True, BLACK)
-            screen.blit(e_text, (8, size[1] - 90))
+                screen.blit(mp_label, (8, size[1] - 90))
 
-            # 更新我方飞机防护罩（shield）
-            if shields.active:
-                myplane.invincible = True
-                shields.move((myplane.rect.left - 26, myplane.rect.top - 6))
-                # 被激光击中时候闪烁图片
-                if shields.hit:
-                    if switch_image:
-                        screen.blit(shields.image2, shields.rect)
+                # 我方飞机防护罩（shield）
+                if shields.active:
+                    # 被激光击中时候闪烁图片
+                    if shields.hit:
+                        if switch_image:
+                            screen.blit(shields.image2, shields.rect)
+                        else:
+                            screen.blit(shields.image1, shields.rect)
                     else:
                         screen.blit(shields.image1, shields.rect)
-                    shields.hit = False
 
-                else:
-                    screen.blit(shields.image1, shields.rect)
-
-                # 碰撞检测（与子弹）
-                shields_hit = pygame.sprite.spritecollide(shields, boss_bullets, False, pygame.sprite.collide_mask)
-                if shields_hit:
-                    for e in shields_hit:
-                        e.active = False
-
-                    shields.energy -= 1
-                    if shields.energy <= 0:
-                        shields.active = False
-                        pygame.time.set_timer(INVINCIBLE_TIME, 3 * 1000)
-                # 碰撞检测（与敌机）
-                shields_hit1 = pygame.sprite.spritecollide(shields, enemies, False, pygame.sprite.collide_mask)
-                if shields_hit1:
-                    for u in shields_hit1:
-                        if u in bosses:
-                            u.energy *= 0.8
-                            shields.energy = 0
-                        elif u in bigenemies:
-                            u.active = False
-                            shields.energy -= 100 * lv
-                        elif u in midenemies:
-                            u.active = False
-                            shields.energy -= 50 * lv
-                        else:
-                            u.active = False
-                            shields.energy -= 10 * lv
-                    if shields.energy <= 0:
-                        shields.active = False
-                        pygame.time.set_timer(INVINCIBLE_TIME, 3 * 1000)
-
-                # 绘制防护罩血槽
-                # pygame.draw.line(screen,background_colour,(45,size[1] - 110), (105, size[1] - 110), 15)
-                _remain = shields.energy / shield.Shield.energy
-                # 能量小于20%显示红色,其他绿色
-                if _remain <= 0.2:
-                    colour = YELLOW
-                else:
-                    colour = RED
-                pygame.draw.line(screen, colour, (45, size[1] - 110), (45 + 60 * _remain, size[1] - 110), 15)
-
-                e_text = score_font1.render("hp: ", True, BLACK)
-                screen.blit(e_text, (10, size[1] - 120))
-
-            # 加载飞弹
-            if not (delay % 100):
-                if isinstance(lv, int):
-                    if lv >= 2 and is_double:
-                        feidan[feidan_index + 0].reset((myplane.rect.centerx - 66, myplane.rect.centery))
-                        feidan[feidan_index + 1].reset((myplane.rect.centerx + 48, myplane.rect.centery))
-                        feidan_index = (feidan_index + 2) % FEIDAN_NUM
-                else:
-                    feidan[feidan_index + 0].reset((myplane.rect.centerx - 66, myplane.rect.centery))
-                    feidan[feidan_index + 1].reset((myplane.rect.centerx + 48, myplane.rect.centery))
-                    feidan_index = (feidan_index + 2) % FEIDAN_NUM
-            """
-            #加载扫屏激光
-            if not(delay % 300):
-                my_lasers[my_lasers_index].reset((0, myplane.rect.top))
-                my_lasers_index = (my_lasers_index + 1) % MY_LASERS_NUM
-
-            if sweep:
-                for each in my_lasers:               
-                    if each.active:
-                        each.move()
-                        screen.blit(each.image, each.rect)
-                        sweep_hit= pygame.sprite.spritecollide(each,enemies,False,pygame.sprite.collide_mask)
-                        if sweep_hit:
-                            for b in enemies:
-                                if b in bigenemies or b in midenemies:
-                                    b.hit = True
-                                    b.energy -= 5
-                                    if b.energy <= 0:
-                                        b.active = False
-                                elif b in bosses:
-                                    b.energy -= 2
-                                    if b.energy <= 0:
-                                        b.active = False
-                                else:
-                                    b.active = False
-            """
-
-            # 加载子弹
-            if not (delay % 10):
-                bullet_sound.play()
-                if not isinstance(lv, str):
-                    if lv == 1:
-                        if is_double:
-                            bullets = bullet2
-                            bullets[bullet2_index + 0].reset((myplane.rect.centerx - 33, myplane.rect.centery))
-                            bullets[bullet2_index + 1].reset((myplane.rect.centerx + 30, myplane.rect.centery))
-                            bullet2_index = (bullet2_index + 2) % BULLET2_NUM
-                        else:
-                            bullets = bullet1
-                            bullets[bullet1_index].reset(myplane.rect.midtop)
-                            bullet1_index = (bullet1_index + 1) % BULLET1_NUM
-
-                    elif lv == 2:
-                        if is_double:
-                            bullets = bullet4
-                            bullets[bullet4_index + 0].reset((myplane.rect.centerx - 33, myplane.rect.centery))
-                            bullets[bullet4_index + 1].reset((myplane.rect.centerx - 15, myplane.rect.centery))
-                            bullets[bullet4_index + 2].reset((myplane.rect.centerx + 15, myplane.rect.centery))
-                            bullets[bullet4_index + 3].reset((myplane.rect.centerx + 30, myplane.rect.centery))
-                            bullet4_index = (bullet4_index + 4) % BULLET4_NUM
-                        else:
-                            bullets = bullet2
-                            bullets[bullet2_index + 0].reset((myplane.rect.centerx - 33, myplane.rect.centery))
-                            bullets[bullet2_index + 1].reset((myplane.rect.centerx + 30, myplane.rect.centery))
-                            bullet2_index = (bullet2_index + 2) % BULLET2_NUM
-
-                    elif lv == 3:
-                        if is_double:
-                            bullets = bullet5
-                            bullets[bullet5_index + 0].reset((myplane.rect.centerx - 34, myplane.rect.centery))
-                            bullets[bullet5_index + 1].reset((myplane.rect.centerx - 15, myplane.rect.centery))
-                            bullets[bullet5_index + 2].reset(myplane.rect.midtop)
-                            bullets[bullet5_index + 3].reset((myplane.rect.centerx + 15, myplane.rect.centery))
-                            bullets[bullet5_index + 4].reset((myplane.rect.centerx + 30, myplane.rect.centery))
-                            bullet5_index = (bullet5_index + 5) % BULLET5_NUM
-                        else:
-                            bullets = bullet3
-                            bullets[bullet3_index + 0].reset((myplane.rect.centerx - 33, myplane.rect.centery))
-                            bullets[bullet3_index + 1].reset(myplane.rect.midtop)
-                            bullets[bullet3_index + 2].reset((myplane.rect.centerx + 30, myplane.rect.centery))
-                            bullet3_index = (bullet3_index + 3) % BULLET3_NUM
-
-                    elif lv == 4:
-                        if is_double:
-                            bullets = bullet6
-                            bullets[bullet6_index + 0].reset((myplane.rect.centerx - 34, myplane.rect.centery))
-                            bullets[bullet6_index + 1].reset((myplane.rect.centerx - 23, myplane.rect.centery))
-                            bullets[bullet6_index + 2].reset((myplane.rect.centerx - 10, myplane.rect.centery))
-                            bullets[bullet6_index + 3].reset((myplane.rect.centerx + 10, myplane.rect.centery))
-                            bullets[bullet6_index + 4].reset((myplane.rect.centerx + 21, myplane.rect.centery))
-                            bullets[bullet6_index + 5].reset((myplane.rect.centerx + 32, myplane.rect.centery))
-                            bullet6_index = (bullet6_index + 6) % BULLET6_NUM
-                        else:
-                            bullets = bullet4
-                            bullets[bullet4_index + 0].reset((myplane.rect.centerx - 33, myplane.rect.centery))
-                            bullets[bullet4_index + 1].reset((myplane.rect.centerx - 15, myplane.rect.centery))
-                            bullets[bullet4_index + 2].reset((myplane.rect.centerx + 15, myplane.rect.centery))
-                            bullets[bullet4_index + 3].reset((myplane.rect.centerx + 30, myplane.rect.centery))
-                            bullet4_index = (bullet4_index + 4) % BULLET4_NUM
-
-                    elif lv == 5:
-                        if is_double:
-                            bullets = bullet7
-                            bullets[bullet7_index + 0].reset((myplane.rect.centerx - 34, myplane.rect.centery))
-                            bullets[bullet7_index + 1].reset((myplane.rect.centerx - 23, myplane.rect.centery))
-                            bullets[bullet7_index + 2].reset((myplane.rect.centerx - 10, myplane.rect.centery))
-                            bullets[bullet7_index + 3].reset(myplane.rect.midtop)
-                            bullets[bullet7_index + 4].reset((myplane.rect.centerx + 10, myplane.rect.centery))
-                            bullets[bullet7_index + 5].reset((myplane.rect.centerx + 21, myplane.rect.centery))
-                            bullets[bullet7_index + 6].reset((myplane.rect.centerx + 32, myplane.rect.centery))
-                            bullet7_index = (bullet7_index + 7) % BULLET7_NUM
-
-                        else:
-                            bullets = bullet5
-                            bullets[bullet5_index + 0].reset((myplane.rect.centerx - 34, myplane.rect.centery))
-                            bullets[bullet5_index + 1].reset((myplane.rect.centerx - 15, myplane.rect.centery))
-                            bullets[bullet5_index + 2].reset(myplane.rect.midtop)
-                            bullets[bullet5_index + 3].reset((myplane.rect.centerx + 15, myplane.rect.centery))
-                            bullets[bullet5_index + 4].reset((myplane.rect.centerx + 30, myplane.rect.centery))
-                            bullet5_index = (bullet5_index + 5) % BULLET5_NUM
-
-                    elif lv == 6:
-                        if is_double:
-                            bullets = bullet9
-                            bullets[bullet9_index + 0].reset((myplane.rect.centerx - 44, myplane.rect.centery))
-                            bullets[bullet9_index + 1].reset((myplane.rect.centerx - 34, myplane.rect.centery))
-                            bullets[bullet9_index + 2].reset((myplane.rect.centerx - 23, myplane.rect.centery))
-                            bullets[bullet9_index + 3].reset((myplane.rect.centerx - 10, myplane.rect.centery))
-                            bullets[bullet9_index + 4].reset(myplane.rect.midtop)
-                            bullets[bullet9_index + 5].reset((myplane.rect.centerx + 10, myplane.rect.centery))
-                            bullets[bullet9_index + 6].reset((myplane.rect.centerx + 21, myplane.rect.centery))
-                            bullets[bullet9_index + 7].reset((myplane.rect.centerx + 32, myplane.rect.centery))
-                            bullets[bullet9_index + 8].reset((myplane.rect.centerx + 42, myplane.rect.centery))
-                            bullet9_index = (bullet9_index + 9) % BULLET9_NUM
-                        else:
-                            bullets = bullet7
-                            bullets[bullet7_index + 0].reset((myplane.rect.centerx - 34, myplane.rect.centery))
-                            bullets[bullet7_index + 1].reset((myplane.rect.centerx - 23, myplane.rect.centery))
-                            bullets[bullet7_index + 2].reset((myplane.rect.centerx - 10, myplane.rect.centery))
-                            bullets[bullet7_index + 3].reset(myplane.rect.midtop)
-                            bullets[bullet7_index + 4].reset((myplane.rect.centerx + 10, myplane.rect.centery))
-                            bullets[bullet7_index + 5].reset((myplane.rect.centerx + 21, myplane.rect.centery))
-                            bullets[bullet7_index + 6].reset((myplane.rect.centerx + 32, myplane.rect.centery))
-                            bullet7_index = (bullet7_index + 7) % BULLET7_NUM
-                else:
-                    if is_double:
-                        bullets = bullet0
-                        bullets[bullet0_index + 0].reset((myplane.rect.centerx - 55, myplane.rect.centery))
-                        bullets[bullet0_index + 1].reset((myplane.rect.centerx - 45, myplane.rect.centery))
-                        bullets[bullet0_index + 2].reset((myplane.rect.centerx - 34, myplane.rect.centery))
-                        bullets[bullet0_index + 3].reset((myplane.rect.centerx - 23, myplane.rect.centery))
-                        bullets[bullet0_index + 4].reset((myplane.rect.centerx - 10, myplane.rect.centery))
-                        bullets[bullet0_index + 5].reset(myplane.rect.midtop)
-                        bullets[bullet0_index + 6].reset((myplane.rect.centerx + 10, myplane.rect.centery))
-                        bullets[bullet0_index + 7].reset((myplane.rect.centerx + 21, myplane.rect.centery))
-                        bullets[bullet0_index + 8].reset((myplane.rect.centerx + 30, myplane.rect.centery))
-                        bullets[bullet0_index + 9].reset((myplane.rect.centerx + 41, myplane.rect.centery))
-                        bullets[bullet0_index + 10].reset((myplane.rect.centerx + 50, myplane.rect.centery))
-                        bullet0_index = (bullet0_index + 11) % BULLET0_NUM
+                    # 绘制防护罩血槽
+                    # pygame.draw.line(screen,background_colour,(45,size[1] - 110), (105, size[1] - 110), 15)
+                    _remain = shields.energy / shield.Shield.energy
+                    # 能量小于20%显示红色,其他绿色
+                    if _remain <= 0.2:
+                        colour = YELLOW
                     else:
-                        bullets = bullet8
-                        bullets[bullet8_index + 0].reset((myplane.rect.centerx - 45, myplane.rect.centery))
-                        bullets[bullet8_index + 1].reset((myplane.rect.centerx - 35, myplane.rect.centery))
-                        bullets[bullet8_index + 2].reset((myplane.rect.centerx - 23, myplane.rect.centery))
-                        bullets[bullet8_index + 3].reset((myplane.rect.centerx - 10, myplane.rect.centery))
-                        bullets[bullet8_index + 4].reset((myplane.rect.centerx + 10, myplane.rect.centery))
-                        bullets[bullet8_index + 5].reset((myplane.rect.centerx + 21, myplane.rect.centery))
-                        bullets[bullet8_index + 6].reset((myplane.rect.centerx + 32, myplane.rect.centery))
-                        bullets[bullet8_index + 7].reset((myplane.rect.centerx + 41, myplane.rect.centery))
-                        bullet8_index = (bullet8_index + 8) % BULLET8_NUM
-                        # =========================================================
-            # 补给（随机奖励生命）
-            if _prize_life:
-                is_all_life = False
-                for each in _prize_life:
+                        colour = RED
+                    screen.line(colour, (45, size[1] - 110), (45 + 60 * _remain, size[1] - 110), 15)
+
+                    screen.blit(hp_label, (10, size[1] - 120))
+
+                # =========================================================
+                # 补给（随机奖励生命）
+                for each in session.prize_life:
                     if each.active:
                         if not delay % 240:
                             switch_image = not switch_image
+                        screen.blit(each.image_list[life_index], each.rect)
                         if switch_image:
-                            screen.blit(each.image_list[life_index], each.rect)
                             life_index = (life_index + 1) % 2
-                        else:
-                            screen.blit(each.image_list[life_index], each.rect)
-                            life_index = (life_index + 2) % 2
-
-                        each.move()
-                        i = pygame.sprite.spritecollide(myplane, _prize_life, False, pygame.sprite.collide_mask)
-                        if i:
-                            for each in i:
-                                each.active = False
-                                _prize_life.remove(each)
-                                if life_num < 6:
-                                    life_num += 1
-
-                    # 未拾取且移动超出边界时释放内存
-                    else:
-                        _prize_life.remove(each)
 
-            # 补给（随机奖励炸弹）
-            if _prize_bomb:
-                is_all_bomb = False
-                for each in _prize_bomb:
+                # 补给（随机奖励炸弹）
+                for each in session.prize_bomb:
                     if each.active:
                         screen.blit(each.image, each.rect)
-                        each.move()
-                        i = pygame.sprite.spritecollide(myplane, _prize_bomb, False, pygame.sprite.collide_mask)
-                        if i:
-                            for each in i:
-                                each.active = False
-                                _prize_bomb.remove(each)
-                                if bomb_num < 6:
-                                    bomb_num += 1
-
-                    # 未拾取且移动超出边界时释放内存
-                    else:
-                        _prize_bomb.remove(each)
-
-            # 补给（固定时间炸弹）
-            if supply_bomb.active:
-                supply_bomb.move()
-                screen.blit(supply_bomb.image, supply_bomb.rect)
-                if supply_bomb.rect.top == -10:
-                    supply_sound.play()
-                    if shields.energy <= 1600:
-                        shields.energy += 400
-                if pygame.sprite.collide_mask(supply_bomb, myplane):
-                    if bomb_num < 6:
-                        bomb_num += 1
-                    supply_bomb.active = False
-
-            # 补给（随机奖励子弹）
-            for each in _prize_bullet:
-                if each.active:
-                    screen.blit(each.image, each.rect)
-                    each.move()
-                    i = pygame.sprite.spritecollide(myplane, _prize_bullet, False, pygame.sprite.collide_mask)
-                    if i:
-                        for each in i:
-                            is_double = True
-                            pygame.time.set_timer(DOUBLE_BULLET_TIME, 18 * 1000)
-                            each.active = False
-                            _prize_bullet.remove(each)
-
-                # 未拾取且移动超出边界时释放内存
-                else:
-                    _prize_bullet.remove(each)
-
-            # 补给（固定时间子弹）
-            if supply_bullet.active:
-                screen.blit(supply_bullet.image, supply_bullet.rect)
-                supply_bullet.move()
-                if supply_bullet.rect.top == -10:
-                    supply_sound.play()
-                    if shields.energy <= 1600:
-                        shields.energy += 400
-                if pygame.sprite.collide_mask(supply_bullet, myplane):
-                    is_double = True
-                    pygame.time.set_timer(DOUBLE_BULLET_TIME, 18 * 1000)
-                    supply_bullet.active = False
-
-            # =========================================================
-            # 敌机尾气
-            if boss.rect.top == 0:
-                if not delay % 1:
-                    boss_bullet[boss_bullet_index].reset((boss.rect.centerx + 22, boss.rect.centery))
-                    boss_bullet[boss_bullet_index + 1].reset((boss.rect.centerx - 120, boss.rect.centery))
-                    boss_bullet_index = (boss_bullet_index + 2) % BOSS_BULLET_NUM
-                for i in boss_bullet:
-                    if i.active:
-                        i.move()
-                        screen.blit(i.image, i.rect)
-                        if pygame.sprite.collide_mask(i, myplane):
-
-                            i.active = False
-                            my_down.play()
-                            life_num -= 1
-                            if life_num >= 0:
-                                myplane.blink = True
-                                is_double = False
-                                myplane.reset()
-                                pygame.time.set_timer(INVINCIBLE_TIME, 3 * 1000)
-                                bomb_num = 3
-                            else:
-                                myplane.active = False
-
-            # 加载敌机boss子弹
-            # 敌机boss子弹与我方碰撞检测
-            if boss.rect.top == 0:
-                if lv in [1, 2]:
-                    boss_bullets = boss_bullet1
-                    if not delay % 120:
-                        boss_bullet1[boss_bullet1_index].reset((boss.rect.centerx + 62, boss.rect.centery))
-                        boss_bullet1[boss_bullet1_index + 1].reset((boss.rect.centerx - 7, boss.rect.centery))
-                        boss_bullet1[boss_bullet1_index + 2].reset((boss.rect.centerx - 50, boss.rect.centery))
-                        boss_bullet1[boss_bullet1_index + 3].reset((boss.rect.centerx - 80, boss.rect.centery))
-                        boss_bullet1_index = (boss_bullet1_index + 4) % BOSS_BULLET1_NUM
-                elif lv in [3, 4]:
-                    boss_bullets = boss_bullet2
-                    if not delay % 130:
-                        boss_bullet2[boss_bullet2_index].reset((boss.rect.centerx + 62, boss.rect.centery))
-                        boss_bullet2[boss_bullet2_index + 1].reset((boss.rect.centerx - 7, boss.rect.centery))
-                        boss_bullet2[boss_bullet2_index + 2].reset((boss.rect.centerx - 50, boss.rect.centery))
-                        boss_bullet2[boss_bullet2_index + 3].reset((boss.rect.centerx - 80, boss.rect.centery))
-                        boss_bullet2_index = (boss_bullet1_index + 4) % BOSS_BULLET2_NUM
-
-                elif lv in [5, 6]:
-                    boss_bullets = boss_bullet3
-                    if not delay % 140:
-                        boss_bullet3[boss_bullet3_index].reset((boss.rect.centerx + 62, boss.rect.centery))
-                        boss_bullet3[boss_bullet3_index + 1].reset((boss.rect.centerx - 5, boss.rect.centery))
-                        boss_bullet3[boss_bullet3_index + 2].reset((boss.rect.centerx - 50, boss.rect.centery))
-                        boss_bullet3[boss_bullet3_index + 3].reset((boss.rect.centerx - 80, boss.rect.centery))
-                        boss_bullet3_index = (boss_bullet1_index + 4) % BOSS_BULLET3_NUM
-
-                if boss_bullets:
-                    for i in boss_bullets:
-                        if i.active:
-                            i.move()
-                            screen.blit(i.image, i.rect)
-
-                        if pygame.sprite.collide_mask(i, myplane):
-                            if not myplane.invincible:
-                                my_down.play()
-                                i.active = False
-                                life_num -= 1
-
-                                if life_num >= 0:
-                                    myplane.blink = True
-                                    is_double = False
-                                    myplane.reset()
-                                    pygame.time.set_timer(INVINCIBLE_TIME, 3 * 1000)
-                                    bomb_num = 3
-                                else:
-                                    myplane.active = False
-
-            # 加载boss激光（直）
-            # 检测激光是否击中我方飞机
-            # 检测激光是否击中飞机防护罩
-            if boss.rect.top == 0 and lv in [3, 4, 5, 6]:
-                if not (_delay % 500):
-                    if isinstance(lv, int):
-                        lasers1[lasers1_index].reset((boss.rect.centerx - 68, boss.rect.centery))
-                        lasers1[lasers1_index + 1].reset((boss.rect.centerx + 53, boss.rect.centery))
-                        lasers1_index = (lasers1_index + 2) % LASERS1_NUM
-
-                if lasers1:
-                    for i in lasers1:
-                        if i.active:
-                            i.move()
-                            screen.blit(i.image, i.rect)
-                            if pygame.sprite.collide_mask(i, myplane):
-                                if not myplane.invincible:
-                                    my_down.play()
-                                    life_num -= 1
-
-                                    if life_num >= 0:
-                                        myplane.blink = True
-                                        is_double = False
-                                        myplane.reset()
-                                        pygame.time.set_timer(INVINCIBLE_TIME, 3 * 1000)
-                                        bomb_num = 3
-                                    else:
-                                        myplane.active = False
-
-                            if shields.active:
-                                if pygame.sprite.collide_mask(i, shields):
-                                    shields.hit = True
-                                    # hp大于15%按百分比伤害，小于直接秒杀
-                                    if _remain > 0.15:
-                                        if lv < 3:
-                                            shields.energy -= shields.energy * 0.01
-                                        elif lv == 3:
-                                            shields.energy -= shields.energy * 0.02
-                                        elif lv == 4:
-                                            shields.energy -= shields.energy * 0.03
-                                        elif lv == 5:
-                                            shields.energy -= shields.energy * 0.04
-                                        else:
-                                            shields.energy -= shields.energy * 0.05
-                                    else:
-                                        shields.energy = 0
-
-                                    if shields.energy <= 0:
-                                        shields.active = False
-                                        pygame.time.set_timer(INVINCIBLE_TIME, 3 * 1000)
-            # 检测飞弹是否击中敌机
-            if feidan:
-                for i in feidan:
-                    if i.active:
-                        i.move()
-                        screen.blit(i.image, i.rect)
-                        enemy_hit = pygame.sprite.spritecollide(i, enemies, False, pygame.sprite.collide_mask)
-                        if enemy_hit:
-                            i.active = False
-                            for b in enemy_hit:
-                                if mp < m - 50:
-                                    mp += 50
-                                if b in bosses:
-                                    b.hit = True
-                                    b.energy -= 70
-                                    if b.energy <= 0:
-                                        b.active = False
-                                elif b in midenemies or b in bigenemies:
-                                    b.hit = True
-                                    b.energy -= 50
-                                    if b.energy <= 0:
-                                        b.active = False
-                                else:
-                                    b.active = False
-
-            # 检测子弹是否击中敌机
-            for i in bullets:
-                if i.active:
-                    i.move()
-                    screen.blit(i.image, i.rect)
-                    enemy_hit = pygame.sprite.spritecollide(i, enemies, False, pygame.sprite.collide_mask)
-                    if enemy_hit:
-                        i.active = False
-                        for b in enemy_hit:
-                            if mp < m:
-                                mp += 1
-
-                            if b in bosses:
-                                b.hit = True
-                                if i.speed == 10:
-                                    b.energy -= 2
-                                else:
-                                    b.energy -= 1
-
-                                if b.energy <= 0:
-                                    b.active = False
-
-                            elif b in midenemies or b in bigenemies:
-                                b.hit = True
 
-                                # 子弹伤害值
-                                if i.speed == 10:
-                                    b.energy -= 2
-                                else:
-                                    b.energy -= 1
-
-                                if b.energy <= 0:
-                                    b.active = False
-
-                            else:
-                                b.active = False
-
-            # 双方飞机碰撞检测
-            enemies_down = pygame.sprite.spritecollide(myplane, enemies, False, pygame.sprite.collide_mask)
-            if enemies_down and (not myplane.invincible):
-                my_down.play()
-                life_num -= 1
-                if life_num >= 0:
-                    myplane.blink = True
-                    is_double = False
-                    myplane.reset()
-                    pygame.time.set_timer(INVINCIBLE_TIME, 3 * 1000)
-                    bomb_num = 3
-                else:
-                    myplane.active = False
+                # 补给（固定时间炸弹）
+                if session.supply_bomb.active:
+                    screen.blit(session.supply_bomb.image, session.supply_bomb.rect)
 
-                for i in enemies_down:
-                    if i in bosses:
-                        i.energy *= 0.8
-                    else:
-                        i.active = False
-
-            # 更新关卡boss
-            if bosses:
-                _delay += 1
-                for each in bosses:
+                # 补给（随机奖励子弹）
+                for each in session.prize_bullet:
                     if each.active:
-                        each.move()
-                        if each.hit:
-                            screen.blit(each.image_hit, each.rect)
-                            each.hit = False
-                        else:
-                            screen.blit(each.image, each.rect)
-                        # 绘制血槽
-                        pygame.draw.line(screen, BLACK, \
-                                         (each.rect.left, each.rect.top + 4), \
-                                         (each.rect.right, each.rect.top + 4))
-                        # 当生命大于20%显示绿色，否则显示红色
-                        energy_remain = each.energy / enemy.Boss.energy
-                        if energy_remain > 0.2:
-                            energy_color = GREEN
-                        else:
-                            energy_color = RED
-                        pygame.draw.line(screen, energy_color, \
-                                         (each.rect.left, each.rect.top + 4), \
-                                         (each.rect.left + each.rect.width * energy_remain, \
-                                          each.rect.top + 4), 4)
-
-                        if lv in [3, 4, 5, 6]:
-                            # 绘制能量
-                            pygame.draw.line(screen, BLACK, \
-                                             (each.rect.left, each.rect.top + 12), \
-                                             (each.rect.right, each.rect.top + 12))
-                            # 能量大于60%显示黄色，否则显示红色
-                            remain = _delay % 500 / 500
-                            if remain > 0.8:
-                                color = RED
-                            else:
-                                color = YELLOW
-
-                            pygame.draw.line(screen, color, \
-                                             (each.rect.left, each.rect.top + 12), \
-                                             (each.rect.left + each.rect.width * remain, \
-                                              each.rect.top + 12), 4)
+                        screen.blit(each.image, each.rect)
 
+                # 补给（固定时间子弹）
+                if session.supply_bullet.active:
+                    screen.blit(session.supply_bullet.image, session.supply_bullet.rect)
+
+                # =========================================================
+                # 敌机尾气、boss子弹和激光
+                if boss.rect.top == 0:
+                    session.boss_exhaust.draw(screen)
+                    session.boss_bullets.draw(screen)
+                    session.boss_lasers.draw(screen)
+                # 飞弹和子弹
+                session.feidan.draw(screen)
+                session.bullets.draw(screen)
+
+                # 更新关卡boss
+                if boss.active:
+                    if boss.hit:
+                        screen.blit(boss.image_hit, boss.rect)
+                        boss.hit = False
+                    else:
+                        screen.blit(boss.image, boss.rect)
+                    # 绘制血槽
+                    screen.line(BLACK, \
+                                (boss.rect.left, boss.rect.top + 4), \
+                                (boss.rect.right, boss.rect.top + 4))
+                    # 当生命大于20%显示绿色，否则显示红色
+                    energy_remain = boss.energy / enemy.Boss.energy
+                    if energy_remain > 0.2:
+                        energy_color = GREEN
                     else:
-                        if not transform:
-                            position = each.rect.center
-                            # 原地生成一个随机奖励
-                            if not choice(range(lv_dict[5])):
-                                prize_bomb = supply.Bomb1(size, position)
-                                _prize_bomb.add(prize_bomb)
-
-                            if not choice(range(lv_dict[5])):
-                                prize_life = _plane.Life(size, position)
-                                _prize_life.add(prize_life)
-
-                            _delay = 0
-
-            # 关卡boss时其他敌机初始待命
-            if not is_move:
-                for each in enemies:
-                    if each not in bosses:
-                        each.reset()
-
-            # 更新大敌机
-            for each in bigenemies:
-                if each.active:
-                    if is_move:
-                        each.move()
-                        if each.hit:
-                            screen.blit(each.image_hit, each.rect)
-                            each.hit = False
+                        energy_color = RED
+                    screen.line(energy_color, \
+                                (boss.rect.left, boss.rect.top + 4), \
+                                (boss.rect.left + boss.rect.width * energy_remain, \
+                                 boss.rect.top + 4), 4)
+
+                    if lv in [3, 4, 5, 6]:
+                        # 绘制能量
+                        screen.line(BLACK, \
+                                    (boss.rect.left, boss.rect.top + 12), \
+                                    (boss.rect.right, boss.rect.top + 12))
+                        # 能量大于60%显示黄色，否则显示红色
+                        remain = session.boss_delay % 500 / 500
+                        if remain > 0.8:
+                            color = RED
                         else:
-                            if switch_image:
-                                screen.blit(each.image1, each.rect)
+                            color = YELLOW
+
+                        screen.line(color, \
+                                    (boss.rect.left, boss.rect.top + 12), \
+                                    (boss.rect.left + boss.rect.width * remain, \
+                                     boss.rect.top + 12), 4)
+
+                # 关卡boss时其他敌机待命，不绘制
+                if session.is_move:
+                    # 更新大敌机
+                    for each in session.bigenemies:
+                        if each.active:
+                            if each.hit:
+                                screen.blit(each.image_hit, each.rect)
+                                each.hit = False
                             else:
-                                screen.blit(each.image2, each.rect)
-
-                        # 绘制血槽
-                        pygame.draw.line(screen, BLACK, \
-                                         (each.rect.left, each.rect.top - 5), \
-                                         (each.rect.right, each.rect.top - 5))
-                        # 当生命大于20%显示绿色，否则显示红色
-                        energy_remain = each.energy / enemy.BigEnemy.energy
-                        if energy_remain > 0.2:
-                            energy_color = GREEN
-                        else:
-                            energy_color = RED
-                        pygame.draw.line(screen, energy_color, \
-                                         (each.rect.left, each.rect.top - 5), \
-                                         (each.rect.left + each.rect.width * energy_remain, \
-                                          each.rect.top - 5), 2)
-                        if each.rect.bottom == -50:
-                            enemy3_flying.play(-1)
-                        elif each.rect.top == each.size[1] - 110:
-                            enemy3_flying.stop()
-
-                else:
-                    # 获取大敌机毁灭时的位置
-                    position = each.rect.center
-                    if not (delay % 3):
-                        if big_destroy_index == 0:
-                            enemy3_down.play()
-                        screen.blit(each.destroy_image[big_destroy_index], each.rect)
-                        big_destroy_index = (big_destroy_index + 1) % 6
-                        if big_destroy_index == 0:
-                            enemy3_flying.stop()
-                            score += 100
-                            each.reset()
-                            # 原地生成一个随机奖励
-                            if not choice(range(10)):
-                                prize_bomb = supply.Bomb1(size, position)
-                                _prize_bomb.add(prize_bomb)
-                            if not choice(range(10)):
-                                prize_bullet = supply.Bullet1(size, position)
-                                _prize_bullet.add(prize_bullet)
-                            if not choice(range(20)):
-                                prize_life = _plane.Life(size, position)
-                                _prize_life.add(prize_life)
-
-            # 更新中敌机
-            for each in midenemies:
-                if each.active:
-                    if is_move:
-                        each.move()
-                        if each.hit:
-                            screen.blit(each.image_hit, each.rect)
-                            each.hit = False
-                        else:
+                                if switch_image:
+                                    screen.blit(each.image1, each.rect)
+                                else:
+                                    screen.blit(each.image2, each.rect)
+
+                            # 绘制血槽
+                            screen.line(BLACK, \
+                                        (each.rect.left, each.rect.top - 5), \
+                                        (each.rect.right, each.rect.top - 5))
+                            # 当生命大于20%显示绿色，否则显示红色
+                            energy_remain = each.energy / enemy.BigEnemy.energy
+                            if energy_remain > 0.2:
+                                energy_color = GREEN
+                            else:
+                                energy_color = RED
+                            screen.line(energy_color, \
+                                        (each.rect.left, each.rect.top - 5), \
+                                        (each.rect.left + each.rect.width * energy_remain, \
+                                         each.rect.top - 5), 2)
+                            if each.rect.bottom == -50:
+                                enemy3_flying.play(-1)
+                            elif each.rect.top == each.size[1] - 110:
+                                enemy3_flying.stop()
+
+                    # 更新中敌机
+                    for each in session.midenemies:
+                        if each.active:
+                            if each.hit:
+                                screen.blit(each.image_hit, each.rect)
+                                each.hit = False
+                            else:
+                                screen.blit(each.image, each.rect)
+                            # 绘制血槽
+                            screen.line(BLACK, \
+                                        (each.rect.left, each.rect.top - 5), \
+                                        (each.rect.right, each.rect.top - 5))
+                            # 当生命大于20%显示绿色，否则显示红色
+                            energy_remain = each.energy / enemy.MidEnemy.energy
+                            if energy_remain > 0.2:
+                                energy_color = GREEN
+                            else:
+                                energy_color = RED
+                            screen.line(energy_color, \
+                                        (each.rect.left, each.rect.top - 5), \
+                                        (each.rect.left + each.rect.width * energy_remain, \
+                                         each.rect.top - 5), 2)
+
+                    # 更新小敌机
+                    for each in session.smallenemies:
+                        if each.active:
                             screen.blit(each.image, each.rect)
-                        # 绘制血槽
-                        pygame.draw.line(screen, BLACK, \
-                                         (each.rect.left, each.rect.top - 5), \
-                                         (each.rect.right, each.rect.top - 5))
-                        # 当生命大于20%显示绿色，否则显示红色
-                        energy_remain = each.energy / enemy.MidEnemy.energy
-                        if energy_remain > 0.2:
-                            energy_color = GREEN
-                        else:
-                            energy_color = RED
-                        pygame.draw.line(screen, energy_color, \
-                                         (each.rect.left, each.rect.top - 5), \
-                                         (each.rect.left + each.rect.width * energy_remain, \
-                                          each.rect.top - 5), 2)
-                else:
-                    position = each.rect.center
-                    if not (delay % 3):
-                        if mid_destroy_index == 0:
-                            enemy2_down.play()
-                        screen.blit(each.destroy_image[mid_destroy_index], each.rect)
-                        mid_destroy_index = (mid_destroy_index + 1) % 4
-                        if mid_destroy_index == 0:
-                            score += 5
-                            each.reset()
-                            if not choice(range(100)):
-                                prize_bomb = supply.Bomb1(size, position)
-                                _prize_bomb.add(prize_bomb)
-                            if not choice(range(100)):
-                                prize_bullet = supply.Bullet1(size, position)
-                                _prize_bullet.add(prize_bullet)
-                            if not choice(range(200)):
-                                prize_life = _plane.Life(size, position)
-                                _prize_life.add(prize_life)
-            # 更新小敌机
-            for each in smallenemies:
-                if each.active:
-                    if is_move:
-                        each.move()
-                        screen.blit(each.image, each.rect)
-                else:
-                    position = each.rect.center
-                    if not (delay % 3):
-                        if small_destroy_index == 0:
-                            enemy1_down.play()
-                        screen.blit(each.destroy_image[small_destroy_index], each.rect)
-                        small_destroy_index = (small_destroy_index + 1) % 4
-                        if small_destroy_index == 0:
-                            score += 100
-                            each.reset()
-                            if not choice(range(1000)):
-                                prize_bomb = supply.Bomb1(size, position)
-                                _prize_bomb.add(prize_bomb)
-                            if not choice(range(1000)):
-                                prize_bullet = supply.Bullet1(size, position)
-                                _prize_bullet.add(prize_bullet)
-                            if not choice(range(2000)):
-                                prize_life = _plane.Life(size, position)
-                                _prize_life.add(prize_life)
-            delay -= 1
-            if not delay:
-                delay = 1000
-
-        elif life_num < 0:
-            screen.fill(background_colour)
-            #pygame.mixer.music.stop()
-            pygame.mixer.stop()
-            enemy.BigEnemy.energy = 40
-            enemy.MidEnemy.energy = 10
-            enemy.Boss.energy = 200
-            if not opened:
-                # 稍微延迟下刷新
-                pygame.time.delay(1000)
-                file = "recode.txt"
-                if not os.path.exists(file):
-                    with open(file, "w") as g:
-                        g.write("0")
-
-                with open(file, "r") as f:
-                    recode_score = int(f.read())
-                    if score > recode_score:
-                        score_best = score_font.render("The best: %s" % str(score), True, BLACK)
-                        congratulate = score_font2.render("Congratulations on your record !", True, BLACK)
-                        # 刷新记录祝贺
-                        is_congratulate = True
-                        con_rect = congratulate.get_rect()
-                        con_rect.left, con_rect.top = (size[0] - con_rect.width) // 2, \
-                                                      (size[1] - con_rect.height) // 2 + 50
-
-                        with open(file, "w") as f:
-                            f.write(str(score))
-                    else:
-                        score_best = score_font.render("The best: %s" % str(recode_score), True, BLACK)
-
-                    score_player = score_font1.render("Your Score:%s" % str(score), True, BLACK)
-                    # Game over
-                    gameover_image = score_font.render("Game over !", True, BLACK)
-                    gameover_image_rect = gameover_image.get_rect()
-                    gameover_image_rect.left, gameover_image_rect.top = \
-                        (size[0] - gameover_image_rect.width) // 2, \
-                        (size[1] - gameover_image_rect.height) // 2
 
-                opened = True
-
-            # 绘制结束界面
-            if is_congratulate:
-                screen.blit(congratulate, con_rect)
-            screen.blit(restart_image, restart_rect)
-            screen.blit(stop_image, stop_rect)
-            screen.blit(score_best, (20, 20))
-            screen.blit(score_player, (20, 80))
-            screen.blit(gameover_image, gameover_image_rect)
-
-        # 绘制缓存
-        pygame.display.flip()
-        clock.tick(60)
-        #print(clock.get_fps())
+                # 敌机毁灭动画，动画播完时敌机已经复位，在记下的位置绘制最后一格
+                for each, index, rect in session.explosions:
+                    if index == 0:
+                        down_sounds[each.profile.kind].play()
+                    screen.blit(each.destroy_image[index], rect)
+                    if each.profile.kind == enemy.BIG and index == len(each.destroy_image) - 1:
+                        enemy3_flying.stop()
+
+            # 结束界面会等待1秒并读写recode.txt，headless时游戏结束就直接报告，不进入这里
+            elif session.done and not args.headless:
+                screen.fill(background_colour)
+                #pygame.mixer.music.stop()
+                pygame.mixer.stop()
+                score = session.score
+                if not opened:
+                    # 稍微延迟下刷新
+                    pygame.time.delay(1000)
+                    file = "recode.txt"
+                    if not os.path.exists(file):
+                        with open(file, "w") as g:
+                            g.write("0")
+
+                    with open(file, "r") as f:
+                        recode_score = int(f.read())
+                        if score > recode_score:
+                            score_best = score_font.render("The best: %s" % str(score), True, BLACK)
+                            congratulate = score_font2.render("Congratulations on your record !", True, BLACK)
+                            # 刷新记录祝贺
+                            is_congratulate = True
+                            con_rect = congratulate.get_rect()
+                            con_rect.left, con_rect.top = (size[0] - con_rect.width) // 2, \
+                                                          (size[1] - con_rect.height) // 2 + 50
+
+                            with open(file, "w") as f:
+                                f.write(str(score))
+                        else:
+                            score_best = score_font.render("The best: %s" % str(recode_score), True, BLACK)
+
+                        score_player = score_font1.render("Your Score:%s" % str(score), True, BLACK)
+                        # Game over
+                        gameover_image = score_font.render("Game over !", True, BLACK)
+                        gameover_image_rect = gameover_image.get_rect()
+                        gameover_image_rect.left, gameover_image_rect.top = \
+                            (size[0] - gameover_image_rect.width) // 2, \
+                            (size[1] - gameover_image_rect.height) // 2
+
+                    opened = True
+
+                # 绘制结束界面
+                if is_congratulate:
+                    screen.blit(congratulate, con_rect)
+                screen.blit(restart_image, restart_rect)
+                screen.blit(stop_image, stop_rect)
+                screen.blit(score_best, (20, 20))
+                screen.blit(score_player, (20, 80))
+                screen.blit(gameover_image, gameover_image_rect)
+
+            # 绘制缓存
+            if args.headless:
+                # 不限帧率，尽可能快地推进；游戏结束时只统计实际模拟的帧
+                screen.update()
+                frame_count += 1
+                if frame_count >= args.frames or session.done:
+                    elapsed = time.perf_counter() - start_time
+                    print("headless: %d frames in %.2fs, %.1f fps, score %d, trace %s"
+                          % (frame_count, elapsed, frame_count / elapsed, session.score, trace.hexdigest()))
+                    return
+                continue
+            # 每次循环推进一个TICK；落后超过一个TICK时下一次循环只模拟不绘制，直到追上实际时间
+            if screen.drawing:
+                screen.update()
+                lag += clock.tick(FPS) / 1000.0
+                if lag > MAX_LAG:
+                    lag = MAX_LAG
+            lag -= TICK
+            screen.drawing = lag < TICK
+            #print(clock.get_fps())
+    finally:
+        # 退出、重新开始或出错时都要释放，否则推理进程、共享内存和采集线程会留下来
+        if pose_engine is not None:
+            pose_engine.release()
+        if cap is not None:
+            cap.release()
+            # 只有用摄像头时才有OpenCV窗口，headless的OpenCV没有窗口支持
+            cv2.destroyAllWindows()
+    if restart:
+        main()
 
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="face controlled game")
-    parser.add_argument('-c', '--camera', help="camera index", type=int, default=10)
-    parser.add_argument('-d', '--device', help="target device id", type=str)
-    #parser.add_argument('-b', '--db_file', help="face database path", required=True)
-    parser.add_argument('-b', '--db_file', help="face database path", default="face.db")
-    parser.add_argument('-i', '--image_dir', help="import image dir")
-    args = parser.parse_args()
-
-    face_det_handle = RockX(RockX.ROCKX_MODULE_FACE_DETECTION, target_device=args.device)
-    face_landmark68_handle = RockX(RockX.ROCKX_MODULE_FACE_LANDMARK_68, target_device=args.device)
-    face_landmark5_handle = RockX(RockX.ROCKX_MODULE_FACE_LANDMARK_5, target_device=args.device)
-    face_recog_handle = RockX(RockX.ROCKX_MODULE_FACE_RECOGNIZE, target_device=args.device)
-    face_track_handle = RockX(RockX.ROCKX_MODULE_OBJECT_TRACK, target_device=args.device)
+    args = build_arg_parser().parse_args()
+    init_display(args.headless)
+
+    # 每局的种子在main()里决定，记录时写进文件
+    replay = InputReplay(args.replay) if args.replay else None
+    recorder = InputRecorder(args.record) if args.record else None
+
+    if uses_rockx(args):
+        face_det_handle = RockX(RockX.ROCKX_MODULE_FACE_DETECTION, target_device=args.device)
+        face_landmark68_handle = RockX(RockX.ROCKX_MODULE_FACE_LANDMARK_68, target_device=args.device)
+        face_landmark5_handle = RockX(RockX.ROCKX_MODULE_FACE_LANDMARK_5, target_device=args.device)
+        face_recog_handle = RockX(RockX.ROCKX_MODULE_FACE_RECOGNIZE, target_device=args.device)
+        face_track_handle = RockX(RockX.ROCKX_MODULE_OBJECT_TRACK, target_device=args.device)
     
     
     try:
@@ -1866,5 +1186,9 @@ if __name__ == "__main__":
     except:
         traceback.print_exc()
         pygame.quit()
-        input("press any key quit")
-    gif = imageio
+        # headless时没有人在终端前等待，直接退出
+        if not args.headless:
+            input("press any key quit")
+    finally:
+        if recorder is not None:
+            recorder.close()
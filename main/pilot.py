@@ -0,0 +1,98 @@
+import random
+
+from game import NOOP, UP, DOWN, LEFT, RIGHT, SHIELD, BOMB
+
+
+class HeadControl(object):
+    """
+    把头部姿态(pitch, yaw, roll, lips_distance)换成GameSession的动作，main()和ScriptedPilot共用
+    左右转头超过参考角度2度时左右移动，抬头低头超过1度时上下移动；张嘴放炸弹，闭嘴之后才能再放
+    """
+
+    def __init__(self):
+        self.pitch_ref = 0
+        self.yaw_ref = 0
+        # 张嘴就是炸弹，lips_distance<0.045为闭嘴
+        self.mouth_closed = False
+
+    def calibrate(self, pitch, yaw):
+        """
+        把当前角度设为头部初始角度
+        """
+        self.pitch_ref = pitch
+        self.yaw_ref = yaw
+
+    def actions(self, pitch, yaw, roll, lips_distance):
+        actions = []
+        if yaw < self.yaw_ref - 2 and yaw != 0:
+            actions.append(LEFT)  # 由于摄像头演示中镜面关系，实际使用中请设置为RIGHT
+        elif yaw > self.yaw_ref + 2 and yaw != 0:
+            actions.append(RIGHT)  # 由于摄像头演示中镜面关系，实际使用中请设置为LEFT
+        elif pitch < self.pitch_ref - 1 and pitch != 0:
+            actions.append(UP)
+        elif pitch > self.pitch_ref + 1 and pitch != 0:
+            actions.append(DOWN)
+        if lips_distance < 0.045:
+            self.mouth_closed = True
+        if lips_distance > 0.055 and self.mouth_closed:
+            self.mouth_closed = False
+            actions.append(BOMB)
+        return actions
+
+
+class ScriptedPilot(object):
+    """
+    没有摄像头时的脚本输入
+    代替头部姿态识别输出(pitch, yaw, roll, lips_distance)：
+    飞机每sweep帧换一次方向左右来回移动，每bomb_interval帧张一次嘴放炸弹（0表示不放）
+    phase是开局时脚本已经走过的帧数，批量模拟时每局取不同的值
+    """
+
+    # 超过HeadControl里左右移动的阈值（2度）和张嘴阈值（0.055）
+    YAW = 10.0
+    LIPS_OPEN = 0.06
+
+    def __init__(self, sweep=90, bomb_interval=600, phase=0):
+        self.sweep = sweep
+        self.bomb_interval = bomb_interval
+        self.frame_count = phase
+        self.control = HeadControl()
+
+    def step(self):
+        frame = self.frame_count
+        self.frame_count += 1
+        yaw = -self.YAW if (frame // self.sweep) % 2 else self.YAW
+        lips_distance = 0
+        if self.bomb_interval and frame % self.bomb_interval == self.bomb_interval - 1:
+            lips_distance = self.LIPS_OPEN
+        return 0.0, yaw, 0.0, lips_distance
+
+    def action(self):
+        """
+        和main()一样用HeadControl把step()的输出换成这一帧的动作
+        """
+        return self.control.actions(*self.step())
+
+
+class RandomPilot(object):
+    """
+    随机操作：每hold帧随机换一个动作，偶尔开防护罩或放炸弹
+    """
+
+    MOVES = (NOOP, UP, DOWN, LEFT, RIGHT)
+
+    def __init__(self, seed=None, hold=15, special=0.02):
+        self.random = random.Random(seed)
+        self.hold = hold
+        self.special = special
+        self.frame_count = 0
+        self.move = NOOP
+
+    def action(self):
+        frame = self.frame_count
+        self.frame_count += 1
+        if self.random.random() < self.special:
+            return self.random.choice((SHIELD, BOMB))
+        if frame % self.hold == 0:
+            self.move = self.random.choice(self.MOVES)
+        return self.move
@@ -1,24 +1,25 @@
 import pygame
+import assets
 import sys
 class Plane(pygame.sprite.Sprite):
     def __init__(self,size):
         pygame.sprite.Sprite.__init__(self)
-        self.image1 = pygame.image.load("images/me1.png").convert_alpha()
-        self.image2 = pygame.image.load("images/me2.png").convert_alpha()
+        self.image1 = assets.load_image("images/me1.png")
+        self.image2 = assets.load_image("images/me2.png")
         self.rect = self.image1.get_rect()
         self.size = size
         self.rect.left, self.rect.top = (self.size[0] - self.rect.width)//2, self.size[1]-self.rect.height-57        
         self.speed = 10
         self.destroy_image = []
-        self.destroy_image.extend([\
-            pygame.image.load("images/me_destroy_1.png").convert_alpha(),\
-            pygame.image.load("images/me_destroy_2.png").convert_alpha(),\
-            pygame.image.load("images/me_destroy_3.png").convert_alpha(),\
-            pygame.image.load("images/me_destroy_4.png").convert_alpha()])
+        self.destroy_image.extend(assets.load_images([\
+            "images/me_destroy_1.png",\
+            "images/me_destroy_2.png",\
+            "images/me_destroy_3.png",\
+            "images/me_destroy_4.png"]))
         self.active = True
         self.invincible = False
         self.blink = False
-        self.mask = pygame.mask.from_surface(self.image1)
+        self.mask = assets.get_mask(self.image1)
 
     def move_up(self):
         self.rect.top -= self.speed
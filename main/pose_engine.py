@@ -0,0 +1,217 @@
+"""独立进程的头部姿态推理引擎
+
+游戏进程把摄像头画面写入共享内存环形缓冲区（不经过pickle），
+推理进程只处理最新一帧，并把(pitch, yaw, roll, timestamp)写回共享结果区。
+"""
+
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import time
+
+import numpy as np
+
+
+class FakePoseBackend(object):
+    """
+    不依赖RockX的替代后端
+    用画面亮度重心相对画面中心的偏移模拟头部角度，用于没有RockX的机器上调试整条流水线
+    """
+
+    def __init__(self, max_angle=30.0):
+        self.max_angle = max_angle
+
+    def open(self):
+        pass
+
+    def estimate(self, frame):
+        gray = frame[::8, ::8].mean(axis=2)
+        total = gray.sum()
+        if total <= 0:
+            return None
+        h, w = gray.shape
+        cy = (gray.sum(axis=1) * np.arange(h)).sum() / total
+        cx = (gray.sum(axis=0) * np.arange(w)).sum() / total
+        pitch = (cy / h - 0.5) * 2 * self.max_angle
+        yaw = (cx / w - 0.5) * 2 * self.max_angle
+        return pitch, yaw, 0.0
+
+    def close(self):
+        pass
+
+
+class RockXPoseBackend(object):
+    """
+    RockX后端：人脸检测 + 68点关键点 + rockx_face_pose
+    RockX句柄在推理进程里创建，不跨进程共享
+    face_track/detect_scale 的含义同 face_track.FaceTracker，
+    landmark_interval/flow_error 的含义同 face_track.LandmarkFlow
+    """
+
+    def __init__(self, device=None, face_track=False, redetect_interval=30, detect_scale=1.0,
+                 landmark_interval=1, flow_error=2.0):
+        self.device = device
+        self.face_track = face_track
+        self.redetect_interval = redetect_interval
+        self.detect_scale = detect_scale
+        self.landmark_interval = landmark_interval
+        self.flow_error = flow_error
+        self.face_det_handle = None
+        self.face_landmark68_handle = None
+        self.face_tracker = None
+        self.landmark_flow = None
+
+    def open(self):
+        from rockx import RockX
+        from face_track import FaceTracker, LandmarkFlow, box_area
+        self.box_area = box_area
+        self.RockX = RockX
+        self.face_det_handle = RockX(RockX.ROCKX_MODULE_FACE_DETECTION, target_device=self.device)
+        self.face_landmark68_handle = RockX(RockX.ROCKX_MODULE_FACE_LANDMARK_68, target_device=self.device)
+        redetect_interval = self.redetect_interval if self.face_track else 1
+        self.face_tracker = FaceTracker(self.face_det_handle, redetect_interval,
+                                        detect_scale=self.detect_scale)
+        if self.landmark_interval > 1:
+            self.landmark_flow = LandmarkFlow(self.face_landmark68_handle, self.landmark_interval,
+                                              self.flow_error)
+
+    def estimate(self, frame):
+        RockX = self.RockX
+        in_img_h, in_img_w = frame.shape[:2]
+        results = self.face_tracker.detect(frame)
+        if not results:
+            if self.landmark_flow is not None:
+                self.landmark_flow.reset()
+            return None
+        # 只跟踪画面中最大的人脸
+        face = max(results, key=lambda result: self.box_area(result.box))
+        if self.landmark_flow is not None:
+            ret, landmark = self.landmark_flow.landmark(frame, face.box)
+        else:
+            ret, landmark = self.face_landmark68_handle.rockx_face_landmark(frame, in_img_w, in_img_h,
+                                                                            RockX.ROCKX_PIXEL_FORMAT_BGR888,
+                                                                            face.box)
+        if ret != RockX.ROCKX_RET_SUCCESS or landmark.landmarks_count <= 0:
+            return None
+        ret, face_angle = self.face_landmark68_handle.rockx_face_pose(landmark)
+        if face_angle is None:
+            return None
+        return face_angle.pitch, face_angle.yaw, face_angle.roll
+
+    def close(self):
+        self.face_det_handle = None
+        self.face_landmark68_handle = None
+        self.face_tracker = None
+        self.landmark_flow = None
+
+
+# _state 各字段下标
+_LATEST_SLOT = 0
+_LATEST_SEQ = 1
+_READING_SLOT = 2
+# _result 各字段下标
+_PITCH, _YAW, _ROLL, _TIMESTAMP, _RESULT_SEQ = range(5)
+
+
+def _engine_worker(shm_name, frame_shape, slots, state, stamps, result, frame_ready, stop, backend):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray((slots,) + frame_shape, dtype=np.uint8, buffer=shm.buf)
+    backend.open()
+    last_seq = 0
+    try:
+        while not stop.is_set():
+            if not frame_ready.wait(0.1):
+                continue
+            frame_ready.clear()
+            with state.get_lock():
+                slot = state[_LATEST_SLOT]
+                seq = state[_LATEST_SEQ]
+                if seq == last_seq:
+                    continue
+                # 标记正在读取的槽位，写入端不会覆盖它
+                state[_READING_SLOT] = slot
+                timestamp = stamps[slot]
+            angles = backend.estimate(ring[slot])
+            with state.get_lock():
+                state[_READING_SLOT] = -1
+            last_seq = seq
+            if angles is None:
+                continue
+            with result.get_lock():
+                result[_PITCH], result[_YAW], result[_ROLL] = angles
+                result[_TIMESTAMP] = timestamp
+                result[_RESULT_SEQ] = seq
+    finally:
+        backend.close()
+        del ring
+        shm.close()
+
+
+class PoseEngine(object):
+    """
+    头部姿态推理进程
+    submit()把一帧写入共享内存环形缓冲区，poll()取回最新的(pitch, yaw, roll, timestamp)
+    """
+
+    def __init__(self, frame_shape, backend, slots=3):
+        if slots < 3:
+            raise ValueError("PoseEngine needs at least 3 slots, got %d" % slots)
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+        frame_size = int(np.prod(self.frame_shape))
+        self._shm = shared_memory.SharedMemory(create=True, size=frame_size * slots)
+        self._ring = np.ndarray((slots,) + self.frame_shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._state = mp.Array('q', [-1, 0, -1])
+        self._stamps = mp.Array('d', slots, lock=False)
+        self._result = mp.Array('d', 5)
+        self._frame_ready = mp.Event()
+        self._stop = mp.Event()
+        self._seq = 0
+        self._read_seq = 0
+        self._process = mp.Process(target=_engine_worker,
+                                   args=(self._shm.name, self.frame_shape, slots, self._state,
+                                         self._stamps, self._result, self._frame_ready,
+                                         self._stop, backend),
+                                   daemon=True)
+
+    def start(self):
+        self._process.start()
+        return self
+
+    def submit(self, frame, timestamp=None):
+        if frame.shape != self.frame_shape:
+            raise ValueError("Expected frame of shape {}, got {}".format(self.frame_shape, frame.shape))
+        with self._state.get_lock():
+            busy = (self._state[_LATEST_SLOT], self._state[_READING_SLOT])
+        # 选一个既不是最新帧也不在读取中的槽位写入
+        slot = (self._seq + 1) % self.slots
+        while slot in busy:
+            slot = (slot + 1) % self.slots
+        np.copyto(self._ring[slot], frame)
+        self._stamps[slot] = time.time() if timestamp is None else timestamp
+        self._seq += 1
+        with self._state.get_lock():
+            self._state[_LATEST_SLOT] = slot
+            self._state[_LATEST_SEQ] = self._seq
+        self._frame_ready.set()
+
+    def poll(self):
+        """
+        取最新的推理结果(pitch, yaw, roll, timestamp)，没有新结果时返回None
+        """
+        with self._result.get_lock():
+            seq = int(self._result[_RESULT_SEQ])
+            if seq == self._read_seq:
+                return None
+            self._read_seq = seq
+            return (self._result[_PITCH], self._result[_YAW],
+                    self._result[_ROLL], self._result[_TIMESTAMP])
+
+    def release(self):
+        self._stop.set()
+        if self._process.is_alive():
+            self._process.join(timeout=1)
+            if self._process.is_alive():
+                self._process.terminate()
+        del self._ring
+        self._shm.close()
+        self._shm.unlink()
@@ -0,0 +1,149 @@
+"""子弹池
+
+所有同类子弹的位置、速度、加速度计时和是否活动都存放在NumPy数组里（struct-of-arrays），
+每帧用一次向量运算推进并剔除离开屏幕的子弹；只有绘制和窄相碰撞检测时才生成rect。
+"""
+
+import numpy as np
+import pygame
+
+import assets
+
+
+class ProjectileKind(object):
+    """
+    子弹种类：图片、碰撞mask和运动参数
+    speed: 初速度，像素/帧，向下为正
+    accel: 每accel_interval帧速度增加accel（按槽位累计移动的帧数，和原来每个子弹对象自己的计时一样，重新发射不清零）
+    damage: 击中中、大型敌机或boss时扣除的能量
+    clip: True时底边到达屏幕底部就消失（激光），否则上边越过屏幕底部才消失
+    """
+
+    def __init__(self, image, speed, accel=0, accel_interval=1, damage=1, clip=False):
+        self.image = image
+        self.mask = assets.get_mask(image)
+        self.width, self.height = image.get_size()
+        self.speed = speed
+        self.accel = accel
+        self.accel_interval = accel_interval
+        self.damage = damage
+        self.clip = clip
+
+
+class Projectile(object):
+    """
+    池里一颗活动子弹的临时视图，提供pygame.sprite.collide_mask需要的rect和mask
+    """
+    __slots__ = ("index", "kind", "rect", "mask")
+
+    def __init__(self, index, kind, rect):
+        self.index = index
+        self.kind = kind
+        self.rect = rect
+        self.mask = kind.mask
+
+
+class ProjectilePool(object):
+    """
+    固定容量的子弹池，和原来的子弹列表一样按环形下标复用槽位
+    """
+
+    def __init__(self, capacity, screen_height):
+        self.capacity = capacity
+        self.screen_height = screen_height
+        self.kinds = []
+        self._kind_ids = {}
+        # 各种类的参数，按kind下标取
+        self._accel = np.zeros(0, dtype=np.int32)
+        self._interval = np.zeros(0, dtype=np.int32)
+        self._height = np.zeros(0, dtype=np.int32)
+        self._clip = np.zeros(0, dtype=bool)
+        # 各槽位的状态
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.vy = np.zeros(capacity, dtype=np.int32)
+        self.age = np.zeros(capacity, dtype=np.int32)
+        self.kind = np.zeros(capacity, dtype=np.int32)
+        self.active = np.zeros(capacity, dtype=bool)
+        # 已经离开屏幕的子弹，本帧仍然绘制和检测碰撞，下一帧剔除
+        self._expired = np.zeros(capacity, dtype=bool)
+        self._next = 0
+
+    def _kind_id(self, kind):
+        kind_id = self._kind_ids.get(kind)
+        if kind_id is None:
+            kind_id = len(self.kinds)
+            self.kinds.append(kind)
+            self._kind_ids[kind] = kind_id
+            self._accel = np.append(self._accel, kind.accel)
+            self._interval = np.append(self._interval, kind.accel_interval)
+            self._height = np.append(self._height, kind.height)
+            self._clip = np.append(self._clip, kind.clip)
+        return kind_id
+
+    def spawn(self, kind, position):
+        """
+        在position（左上角）发射一颗kind子弹，覆盖环形下标处的旧子弹
+        """
+        kind_id = self._kind_id(kind)
+        slot = self._next
+        self._next = (slot + 1) % self.capacity
+        self.x[slot], self.y[slot] = position
+        self.vy[slot] = kind.speed
+        self.kind[slot] = kind_id
+        self.active[slot] = True
+        self._expired[slot] = False
+
+    def step(self):
+        """
+        剔除上一帧离开屏幕的子弹，其余活动子弹前进一帧
+        上边已经到达屏幕顶端（top<=0）的子弹不再移动，本帧原地绘制和检测碰撞后剔除；
+        移动后上边越过屏幕底部（top>屏幕高度）或clip种类底边到达屏幕底部的，本帧过后剔除
+        """
+        active = self.active
+        active &= ~self._expired
+        if not active.any():
+            return
+        kind = self.kind
+        accelerate = active & (self.age % self._interval[kind] == 0)
+        self.vy[accelerate] += self._accel[kind[accelerate]]
+        self.age[active] += 1
+        stopped = active & (self.y <= 0)
+        moving = active & ~stopped
+        self.y[moving] += self.vy[moving]
+        expired = self.y > self.screen_height
+        expired |= self._clip[kind] & (self.y + self._height[kind] >= self.screen_height)
+        self._expired = stopped | (moving & expired)
+
+    def draw(self, surface):
+        indices = np.flatnonzero(self.active)
+        if not len(indices):
+            return
+        kinds = self.kinds
+        surface.blits([(kinds[k].image, (x, y)) for k, x, y in
+                       zip(self.kind[indices].tolist(), self.x[indices].tolist(), self.y[indices].tolist())],
+                      doreturn=False)
+
+    def sprites(self):
+        """
+        生成所有活动子弹的Projectile视图，用于窄相碰撞检测
+        """
+        indices = np.flatnonzero(self.active)
+        kinds = self.kinds
+        result = []
+        for index, k, x, y in zip(indices.tolist(), self.kind[indices].tolist(),
+                                  self.x[indices].tolist(), self.y[indices].tolist()):
+            kind = kinds[k]
+            result.append(Projectile(index, kind, pygame.Rect(x, y, kind.width, kind.height)))
+        return result
+
+    def kill(self, index):
+        self.active[index] = False
+
+    def clear(self):
+        self.active[:] = False
+        self._expired[:] = False
+        self._next = 0
+
+    def __len__(self):
+        return int(np.count_nonzero(self.active))
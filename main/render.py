@@ -0,0 +1,105 @@
+import pygame
+
+
+class GameScreen(object):
+    """
+    游戏画面
+    dirty=False时每帧整屏铺背景并flip()；
+    dirty=True时记录每帧绘制过的区域（脏矩形），下一帧只用背景恢复这些区域，
+    并且只把这一帧和上一帧改动过的区域交给pygame.display.update(rects)
+    drawing=False时所有绘制调用都被跳过，用于只推进模拟、不绘制的追赶帧
+    其余属性直接转发给显示Surface
+    """
+
+    def __init__(self, surface, dirty=False):
+        self.surface = surface
+        self.dirty = dirty
+        self.drawing = True
+        self._rects = []
+        self._last_rects = []
+        self._background = None
+        # 下一次提交整个屏幕
+        self._full = True
+
+    def __getattr__(self, name):
+        return getattr(self.surface, name)
+
+    def _mark(self, rect):
+        if self.dirty:
+            self._rects.append(rect)
+        return rect
+
+    def clear(self, background):
+        """
+        每帧开始时铺背景，背景图换了之后整屏重画一次
+        """
+        if not self.drawing:
+            return
+        if not self.dirty or self._full or background is not self._background:
+            self.surface.blit(background, (0, 0))
+            self._background = background
+            self._full = True
+        else:
+            blit = self.surface.blit
+            for rect in self._last_rects:
+                blit(background, rect, rect)
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        if not self.drawing:
+            return None
+        return self._mark(self.surface.blit(source, dest, area, special_flags))
+
+    def blits(self, blit_sequence, doreturn=True):
+        if not self.drawing:
+            return [] if doreturn else None
+        if not self.dirty:
+            return self.surface.blits(blit_sequence, doreturn)
+        rects = self.surface.blits(blit_sequence)
+        self._rects.extend(rects)
+        return rects if doreturn else None
+
+    def fill(self, color, rect=None, special_flags=0):
+        if not self.drawing:
+            return None
+        return self._mark(self.surface.fill(color, rect, special_flags))
+
+    def line(self, color, start_pos, end_pos, width=1):
+        if not self.drawing:
+            return None
+        return self._mark(pygame.draw.line(self.surface, color, start_pos, end_pos, width))
+
+    def update(self):
+        """
+        把这一帧提交到屏幕
+        """
+        if not self.dirty:
+            pygame.display.flip()
+            return
+        if self._full:
+            pygame.display.flip()
+            self._full = False
+        else:
+            pygame.display.update(self._last_rects + self._rects)
+        self._last_rects = self._rects
+        self._rects = []
+
+
+class CachedText(object):
+    """
+    HUD文字缓存
+    render()的参数和上一次相同时直接返回上一次渲染的Surface，只在显示的值变化时重新栅格化
+    """
+
+    def __init__(self, font, fmt, color, antialias=True):
+        self.font = font
+        self.fmt = fmt
+        self.color = color
+        self.antialias = antialias
+        self._values = None
+        self._surface = None
+
+    def render(self, *values):
+        if self._surface is None or values != self._values:
+            self._values = values
+            self._surface = self.font.render(self.fmt % values, self.antialias, self.color)
+        return self._surface
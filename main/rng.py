@@ -0,0 +1,23 @@
+"""游戏随机数
+
+敌机、补给、奖励等所有随机位置和掉落都从同一个可设置种子的随机数流里取，
+同一个种子配合同一份输入记录（见inputlog）可以完整重现一局游戏。
+"""
+
+import random
+
+stream = random.Random()
+
+randint = stream.randint
+choice = stream.choice
+
+
+def seed(value=None):
+    stream.seed(value)
+
+
+def new_seed():
+    """
+    没有指定种子时随机生成一个，用于写进输入记录
+    """
+    return random.SystemRandom().randrange(1 << 32)
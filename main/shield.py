@@ -1,4 +1,5 @@
 import pygame
+import assets
 
 class Shield(pygame.sprite.Sprite):
     energy = 1500
@@ -6,9 +7,9 @@ class Shield(pygame.sprite.Sprite):
     def __init__(self):
         pygame.sprite.Sprite.__init__(self)
 
-        self.image1 = pygame.image.load("images/shield01.png").convert_alpha()
-        self.image2 = pygame.image.load("images/shield02.png").convert_alpha()
-        self.mask = pygame.mask.from_surface(self.image1)
+        self.image1 = assets.load_image("images/shield01.png")
+        self.image2 = assets.load_image("images/shield02.png")
+        self.mask = assets.get_mask(self.image1)
         self.rect = self.image1.get_rect()
         self.active = False
         self.hit = False
@@ -0,0 +1,198 @@
+"""批量模拟
+
+用进程池并行跑许多局无渲染的游戏（GameSession），每局有自己的种子和脚本输入，
+汇总每关的存活时间、得分和每帧耗时，用于调整难度参数（LEVEL_SCORES、敌机能量等）。
+
+    python simulate.py --games 1000 --jobs 8 --policy random
+
+--check N对照同一个种子下GameSession和main.py --headless前N帧的得分和逐帧observation，两者应该完全一致。
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# 每帧耗时直方图：0~50ms，每格0.05ms，最后一格收集更慢的帧
+FRAME_TIME_BINS = np.append(np.arange(0, 50.05, 0.05), np.inf)
+
+# 每个工作进程持有一个GameSession，图片只加载一次
+_session = None
+
+
+def _init_worker():
+    global _session
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    import game
+    _session = game.GameSession()
+
+
+def make_pilot(policy, seed):
+    from pilot import ScriptedPilot, RandomPilot
+    if policy == "random":
+        return RandomPilot(seed)
+    # 固定脚本按种子错开起始相位，否则各局输入完全相同
+    return ScriptedPilot(phase=seed)
+
+
+def play(item):
+    """
+    跑一局，返回(种子, 得分, 最高关卡, 是否结束, 各关帧数, 各关损失生命数, 帧耗时直方图)
+    """
+    seed, policy, max_frames = item
+    session = _session
+    pilot = make_pilot(policy, seed)
+    session.reset(seed)
+    level_frames = {}
+    level_deaths = {}
+    frame_times = []
+    clock = time.perf_counter
+    done = False
+    while not done and session.frame < max_frames:
+        lv = session.lv
+        life_num = session.life_num
+        start = clock()
+        observation, reward, done, info = session.step(pilot.action())
+        frame_times.append(clock() - start)
+        level_frames[lv] = level_frames.get(lv, 0) + 1
+        if session.life_num < life_num:
+            level_deaths[lv] = level_deaths.get(lv, 0) + life_num - session.life_num
+    histogram = np.histogram(np.array(frame_times) * 1000, FRAME_TIME_BINS)[0]
+    return seed, session.score, session.lv, done, level_frames, level_deaths, histogram
+
+
+def _percentile(histogram, q):
+    """
+    按直方图估计第q百分位的帧耗时（格子上沿，ms）
+    """
+    cumulative = np.cumsum(histogram)
+    index = int(np.searchsorted(cumulative, cumulative[-1] * q / 100.0))
+    return FRAME_TIME_BINS[index + 1]
+
+
+def run(games, jobs, policy="random", max_frames=36000, seed=0):
+    """
+    跑games局，第i局的种子为seed + i，返回汇总结果
+    """
+    items = [(seed + i, policy, max_frames) for i in range(games)]
+    results = []
+    start = time.perf_counter()
+    if jobs > 1:
+        pool = multiprocessing.Pool(jobs, initializer=_init_worker)
+        try:
+            for index, result in enumerate(pool.imap_unordered(play, items), start=1):
+                results.append(result)
+                print('[%d/%d] seed %d score %d lv %d' % (index, games, result[0], result[1], result[2]))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        _init_worker()
+        for index, item in enumerate(items, start=1):
+            result = play(item)
+            results.append(result)
+            print('[%d/%d] seed %d score %d lv %d' % (index, games, result[0], result[1], result[2]))
+    elapsed = time.perf_counter() - start
+    return summarize(results, elapsed)
+
+
+def summarize(results, elapsed):
+    scores = np.array([result[1] for result in results])
+    levels = {}
+    for seed, score, lv, done, level_frames, level_deaths, histogram in results:
+        for each, frames in level_frames.items():
+            stats = levels.setdefault(each, {"games": 0, "frames": 0, "deaths": 0, "game_over": 0})
+            stats["games"] += 1
+            stats["frames"] += frames
+            stats["deaths"] += level_deaths.get(each, 0)
+            if done and each == lv:
+                stats["game_over"] += 1
+    histogram = np.sum([result[6] for result in results], axis=0)
+    frames = int(histogram.sum())
+    return {
+        "games": len(results),
+        "elapsed": elapsed,
+        "frames": frames,
+        "score": {"mean": float(scores.mean()), "median": float(np.median(scores)),
+                  "min": int(scores.min()), "max": int(scores.max())},
+        "levels": levels,
+        "frame_time": {"p50": _percentile(histogram, 50), "p95": _percentile(histogram, 95),
+                       "p99": _percentile(histogram, 99)},
+    }
+
+
+def print_summary(summary, fps=60):
+    print("%d games, %d frames in %.2fs, %.0f frames/s"
+          % (summary["games"], summary["frames"], summary["elapsed"], summary["frames"] / summary["elapsed"]))
+    score = summary["score"]
+    print("score: mean %.1f, median %.1f, min %d, max %d"
+          % (score["mean"], score["median"], score["min"], score["max"]))
+    print("lv  games  game_over  survival(s)  deaths/min")
+    for lv, stats in sorted(summary["levels"].items()):
+        seconds = stats["frames"] / fps
+        print("%-3d %5d  %9d  %11.1f  %10.2f"
+              % (lv, stats["games"], stats["game_over"], seconds / stats["games"],
+                 stats["deaths"] / seconds * 60 if seconds else 0))
+    frame_time = summary["frame_time"]
+    print("frame time (ms): p50 %.2f, p95 %.2f, p99 %.2f"
+          % (frame_time["p50"], frame_time["p95"], frame_time["p99"]))
+
+
+def trace(seed, frames):
+    """
+    用main.py --headless同样的脚本输入跑一局，返回(得分, 逐帧observation的SHA-1)
+    """
+    from pilot import ScriptedPilot
+    _init_worker()
+    session = _session
+    session.reset(seed)
+    pilot = ScriptedPilot()
+    digest = hashlib.sha1()
+    while not session.done and session.frame < frames:
+        observation = session.step(pilot.action())[0]
+        digest.update(observation.tobytes())
+    return session.score, digest.hexdigest()
+
+
+def check(seed, frames):
+    """
+    GameSession和main.py --headless的得分、逐帧轨迹一致时返回True
+    """
+    expected = trace(seed, frames)
+    output = subprocess.run([sys.executable, "main.py", "--headless", "--seed", str(seed), "--frames", str(frames)],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.PIPE,
+                            universal_newlines=True, check=True).stdout
+    match = re.search(r"score (\d+), trace (\w+)", output)
+    actual = (int(match.group(1)), match.group(2)) if match else None
+    print("session:  score %d, trace %s" % expected)
+    print("main.py:  %s" % ("score %d, trace %s" % actual if actual else "no result"))
+    return actual == expected
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="run many headless games in parallel")
+    parser.add_argument('-n', '--games', help="number of games", type=int, default=100)
+    parser.add_argument('-j', '--jobs', help="worker processes", type=int, default=os.cpu_count())
+    parser.add_argument('--policy', help="scripted input of every game", choices=['random', 'sweep'], default='random')
+    parser.add_argument('--max_frames', help="frames after which a game is stopped", type=int, default=36000)
+    parser.add_argument('--seed', help="seed of the first game, game i uses seed + i", type=int, default=0)
+    parser.add_argument('--check', help="compare the score and frame trace of a seeded GameSession with "
+                                        "main.py --headless over this many frames", type=int)
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_arg_parser().parse_args()
+    if args.check:
+        same = check(args.seed, args.check)
+        print("same" if same else "different")
+        sys.exit(0 if same else 1)
+    summary = run(args.games, args.jobs, args.policy, args.max_frames, args.seed)
+    print_summary(summary)
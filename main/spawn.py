@@ -0,0 +1,74 @@
+import heapq
+
+
+class SpawnScheduler(object):
+    """
+    敌机出场调度
+    reset()之后停在屏幕上方的敌机先从所有精灵组里移除，按速度算出它进入屏幕（底边超过-margin）
+    那一帧，放进按帧排序的队列；到帧时把位置推进到原来逐帧移动应到的地方，再加回原来的精灵组。
+    等待中的敌机不移动、不参与碰撞和绘制，出场时间和位置与原来逐帧移动完全一致。
+    update()每帧在移动敌机之前调用一次，boss出现、敌机暂停移动时不调用，出场时间随之顺延。
+    boss阶段游戏循环每帧reset()精灵组里的敌机，停放中的敌机不在精灵组里，
+    保持停放时随机到的位置，不像原来那样每帧重新随机一次
+    """
+
+    def __init__(self, margin=0):
+        self.margin = margin
+        self.frame = 0
+        self._queue = []
+        # sprite -> (停放的帧, 停放时的top, 原来的精灵组, 序号)
+        self._parked = {}
+        self._count = 0
+
+    def __len__(self):
+        return len(self._parked)
+
+    def park(self, sprite):
+        """
+        把刚reset()到屏幕上方的sprite停放起来，已经进入屏幕或不会向下移动的不处理
+        """
+        rect = sprite.rect
+        distance = -self.margin - rect.bottom
+        if distance < 0 or sprite.speed <= 0:
+            self._parked.pop(sprite, None)
+            return
+        # 第moves次移动后底边超过-margin
+        moves = distance // sprite.speed + 1
+        groups = sprite.groups() or self._parked.get(sprite, (None, None, ()))[2]
+        sprite.remove(*groups)
+        self._count += 1
+        self._parked[sprite] = (self.frame, rect.top, groups, self._count)
+        heapq.heappush(self._queue, (self.frame + moves, self._count, sprite))
+
+    def _wake(self, sprite, moves):
+        frame, top, groups, count = self._parked.pop(sprite)
+        sprite.rect.top = top + sprite.speed * moves
+        sprite.add(*groups)
+
+    def update(self):
+        """
+        新的一帧：到了出场时间的敌机回到精灵组，本帧随其他敌机一起移动
+        """
+        self.frame += 1
+        queue = self._queue
+        parked = self._parked
+        while queue and queue[0][0] <= self.frame:
+            entry, count, sprite = heapq.heappop(queue)
+            state = parked.get(sprite)
+            # 停放之后又被reset()过的旧记录
+            if state is None or state[3] != count:
+                continue
+            # 已经移动的帧数，本帧的移动由游戏循环完成
+            self._wake(sprite, self.frame - 1 - state[0])
+
+    def wake_all(self):
+        """
+        所有等待中的敌机立即回到精灵组（停在逐帧移动应到的位置），用于关卡切换时统一调整敌机
+        """
+        for sprite, state in list(self._parked.items()):
+            self._wake(sprite, self.frame - state[0])
+        self._queue = []
+
+    def clear(self):
+        self._queue = []
+        self._parked.clear()
@@ -1,12 +1,13 @@
 import pygame
-from random import *
+import assets
+from rng import randint
 
 class Bomb(pygame.sprite.Sprite):
     def __init__(self,size):
         pygame.sprite.Sprite.__init__(self)
         
-        self.image = pygame.image.load("images/bomb_supply.png").convert_alpha()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.image = assets.load_image("images/bomb_supply.png")
+        self.mask = assets.get_mask(self.image)
         self.rect = self.image.get_rect()
         self.size = size
         self.rect.left, self.rect.top = randint(0, self.size[0]-self.rect.width), -4 * self.rect.height
@@ -29,8 +30,8 @@ class Bomb1(pygame.sprite.Sprite):
     def __init__(self,size,position):
         pygame.sprite.Sprite.__init__(self)
         
-        self.image = pygame.image.load("images/bomb_supply.png").convert_alpha()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.image = assets.load_image("images/bomb_supply.png")
+        self.mask = assets.get_mask(self.image)
         self.rect = self.image.get_rect()
         self.size = size
         self.rect.left, self.rect.top = position
@@ -54,8 +55,8 @@ class Bullet(pygame.sprite.Sprite):
     def __init__(self,size):
         pygame.sprite.Sprite.__init__(self)
         
-        self.image = pygame.image.load("images/bullet_supply.png").convert_alpha()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.image = assets.load_image("images/bullet_supply.png")
+        self.mask = assets.get_mask(self.image)
         self.rect = self.image.get_rect()
         self.size = size
         self.rect.left, self.rect.top = randint(0, self.size[0]-self.rect.width), -3 * self.rect.height
@@ -78,8 +79,8 @@ class Bullet1(pygame.sprite.Sprite):
     def __init__(self,size,position):
         pygame.sprite.Sprite.__init__(self)
 
-        self.image = pygame.image.load("images/bullet_supply.png").convert_alpha()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.image = assets.load_image("images/bullet_supply.png")
+        self.mask = assets.get_mask(self.image)
         self.rect = self.image.get_rect()
         self.size = size
         self.rect.left, self.rect.top = position